@@ -1,17 +1,24 @@
 import streamlit as st
 import os
-from groq import Groq
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from fpdf import FPDF
 import io
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 import json
-from pypdf import PdfReader
-import requests
-import arabic_reshaper
-from bidi.algorithm import get_display
+import time
+import logging
+import uuid
+from renderer import safe_filename, RENDERERS
+from extract import IMPORT_CHAR_BUDGET, extract_text_from_pdf, extract_text_from_docx
+from llm_cache import cache_key, get_cache
+from llm_client import get_client, describe_error
+import ats
+from prompts import resume_sections, cover_letter_prompt, ats_prompt, log_request, estimate_tokens
+import metrics
+from sections import build_resume, stale_sections, section_key
+from tailor import MAX_JOBS, split_jds, tailor_many, TailorZip, zip_path, remove_zip
+from drafts import get_store, from_session, to_session, encode_sections, decode_sections, section_hashes
 
 # ==========================================
 # 1. PAGE CONFIGURATION
@@ -23,26 +30,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# ==========================================
-# 2. FONT SETUP
-# ==========================================
-FONT_URL = "https://github.com/google/fonts/raw/main/ofl/amiri/Amiri-Regular.ttf"
-FONT_BOLD_URL = "https://github.com/google/fonts/raw/main/ofl/amiri/Amiri-Bold.ttf"
-FONT_PATH = "Amiri-Regular.ttf"
-FONT_BOLD_PATH = "Amiri-Bold.ttf"
-
-def check_and_download_font():
-    if not os.path.exists(FONT_PATH) or os.path.getsize(FONT_PATH) < 1000:
-        try: requests.get(FONT_URL, timeout=10).content; open(FONT_PATH, "wb").write(requests.get(FONT_URL).content)
-        except: pass
-    if not os.path.exists(FONT_BOLD_PATH) or os.path.getsize(FONT_BOLD_PATH) < 1000:
-        try: requests.get(FONT_BOLD_URL, timeout=10).content; open(FONT_BOLD_PATH, "wb").write(requests.get(FONT_BOLD_URL).content)
-        except: pass
-
-check_and_download_font()
+logging.basicConfig(level=os.environ.get("CV_LOG_LEVEL", "INFO"))
 
 # ==========================================
-# 3. API & SIDEBAR
+# 2. API & SIDEBAR
 # ==========================================
 api_key = None
 if "GROQ_API_KEY" in st.secrets: api_key = st.secrets["GROQ_API_KEY"]
@@ -51,186 +42,193 @@ with st.sidebar:
     st.title("🎨 Elite CV Builder")
     use_own_key = st.checkbox("Use my own API Key")
     if use_own_key: api_key = st.text_input("Groq API Key", type="password")
+    stream_mode = st.checkbox("Stream responses", value=True, help="Show the text while the model is still writing it.")
+    show_metrics = st.checkbox("Show performance panel", value=False)
+    full_package = st.checkbox("Generate letter & ATS with resume", value=False, help="Write the cover letter and run the ATS check in parallel with the resume.")
 
 if not api_key: st.stop()
-client = Groq(api_key=api_key)
+llm = get_client(api_key, shared=not use_own_key)
 MODEL_NAME = "llama-3.3-70b-versatile"
+response_cache = get_cache()
 
 # ==========================================
-# 4. HELPER FUNCTIONS
+# 3. HELPER FUNCTIONS
 # ==========================================
-def process_text_for_pdf(text):
-    if not text: return ""
-    try: return get_display(arabic_reshaper.reshape(text))
-    except: return text
-
-def extract_text_from_pdf(file):
-    reader = PdfReader(file); text = "" 
-    for page in reader.pages: text += page.extract_text()
-    return text
-
-def extract_text_from_docx(file):
-    doc = Document(file); return "\n".join([para.text for para in doc.paragraphs])
-
+def cached_chat(messages, temperature=None, validate=None, **options):
+    # Identical (model, messages, temperature, options) requests are answered from the shared cache;
+    # validate(text) may raise to reject a reply, which is then neither cached nor returned
+    key = cache_key(MODEL_NAME, messages, temperature, **options)
+    with metrics.span("llm.chat") as info:
+        hit = response_cache.get(key)
+        if hit is not None and validate:
+            try: validate(hit)
+            except Exception: hit = None  # stored before the check existed; ask again
+        info['cache_hit'] = hit is not None
+        if hit is not None: return hit
+        prompt_tokens = log_request("chat", messages)
+        if temperature is not None: options['temperature'] = temperature
+        text = llm.complete(messages, MODEL_NAME, **options)
+        info['tokens'] = prompt_tokens + estimate_tokens(text)
+        if validate: validate(text)
+        response_cache.put(key, text)
+        return text
+
+def json_object(text):
+    if not isinstance(json.loads(text), dict): raise ValueError("expected a JSON object")
+
+@metrics.traced("parse_resume_with_ai")
 def parse_resume_with_ai(text):
-    prompt = f"Extract details. Source: {text[:6000]}. Output JSON: name, email, phone, city, linkedin, portfolio, github, target_title, skills, experience, education_list."
-    try:
-        completion = client.chat.completions.create(model=MODEL_NAME, messages=[{"role": "user", "content": prompt}], response_format={"type": "json_object"})
-        return json.loads(completion.choices[0].message.content)
-    except: return None
+    prompt = f"Extract details. Source: {text[:IMPORT_CHAR_BUDGET]}. Output JSON: name, email, phone, city, linkedin, portfolio, github, target_title, skills, experience, education_list (list of objects with uni, col, deg, year)."
+    try: return json.loads(cached_chat([{"role": "user", "content": prompt}], validate=json_object, response_format={"type": "json_object"}))
+    except Exception: return None
 
+@metrics.traced("get_job_suggestions", metrics.text_size)
 def get_job_suggestions(role_title):
-    try:
-        completion = client.chat.completions.create(model=MODEL_NAME, messages=[{"role": "user", "content": f"Give 5 English resume bullet points for {role_title} with metrics."}])
-        return completion.choices[0].message.content
-    except: return "Error."
+    try: return cached_chat([{"role": "user", "content": f"Give 5 English resume bullet points for {role_title} with metrics."}])
+    except Exception as e: return describe_error(e)
 
+@metrics.traced("safe_generate", metrics.text_size)
 def safe_generate(prompt_text):
-    try:
-        completion = client.chat.completions.create(model=MODEL_NAME, messages=[{"role": "system", "content": "You are a Resume Expert."}, {"role": "user", "content": prompt_text}], temperature=0.3)
-        return completion.choices[0].message.content
-    except Exception as e: return f"Error: {str(e)}"
+    try: return cached_chat([{"role": "system", "content": "You are a Resume Expert."}, {"role": "user", "content": prompt_text}], temperature=0.3)
+    except Exception as e: return describe_error(e)
+
+def section_chat(prompt_text):
+    # Worker-thread safe (no st.* calls); raises so build_resume keeps the old section text
+    return cached_chat([{"role": "system", "content": "You are a Resume Expert."}, {"role": "user", "content": prompt_text}], temperature=0.3)
+
+def build_final_cv(cv_data):
+    # Only sections whose inputs changed since the last build are sent to the model.
+    # In stream mode each section is shown as soon as it is written; on failure the
+    # partial resume is cleared so only the error message remains.
+    live = st.empty() if stream_mode else None
+    res, _, error = build_resume(resume_sections(cv_data), st.session_state.resume_sections, section_chat, on_done=live.markdown if live else None)
+    if live and error: live.empty()
+    return describe_error(error) if error else res
+
+def stream_generate(prompt_text):
+    # Same request as safe_generate, but yields tokens as they arrive; a failure
+    # (even after some tokens) raises, so partial text is never returned as a result
+    messages = [{"role": "system", "content": "You are a Resume Expert."}, {"role": "user", "content": prompt_text}]
+    key = cache_key(MODEL_NAME, messages, 0.3)
+    with metrics.span("llm.stream") as info:
+        hit = response_cache.get(key)
+        info['cache_hit'] = hit is not None
+        if hit is not None: info['chars'] = len(hit); yield hit; return
+        prompt_tokens = log_request("stream", messages); start = time.perf_counter()
+        parts = []
+        for delta in llm.stream(messages, MODEL_NAME, temperature=0.3):
+            if not parts: info['ttft_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            parts.append(delta); yield delta
+        text = "".join(parts)
+        info.update(tokens=prompt_tokens + estimate_tokens(text), chars=len(text))
+        response_cache.put(key, text)
+
+def generate_live(prompt_text):
+    # Renders the stream in place and returns the text, assembled once by st.write_stream,
+    # or an "Error: ..." message (never partial output) if the request fails
+    if not stream_mode: return safe_generate(prompt_text)
+    try: return st.write_stream(stream_generate(prompt_text))
+    except Exception as e: return describe_error(e)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def import_resume(file_hash, file_name, _data):
+    # Keyed by the file's content hash (_data is excluded from Streamlit's hashing);
+    # failures raise so they are not cached.
+    extract = extract_text_from_docx if file_name.lower().endswith(".docx") else extract_text_from_pdf
+    text = extract(io.BytesIO(_data), max_chars=IMPORT_CHAR_BUDGET)
+    if not text.strip(): raise ValueError("No text found in the uploaded file.")
+    parsed = parse_resume_with_ai(text)
+    if not isinstance(parsed, dict): raise ValueError("Could not parse the uploaded CV.")
+    return parsed
+
+def as_text(value, sep):
+    if isinstance(value, list): return sep.join(as_text(v, ", ") for v in value if v)
+    if isinstance(value, dict): return ", ".join(str(v) for v in value.values() if v)
+    return str(value or "")
+
+def apply_imported_profile(cv_data, parsed):
+    for k in ['name', 'email', 'phone', 'city', 'linkedin', 'portfolio', 'github', 'target_title']:
+        if parsed.get(k): cv_data[k] = as_text(parsed[k], ", ")
+    if parsed.get('skills'): cv_data['skills'] = as_text(parsed['skills'], ", ")
+    if parsed.get('experience'): cv_data['raw_experience'] = as_text(parsed['experience'], "\n")
+    edu = [e for e in parsed.get('education_list') or [] if isinstance(e, dict)]
+    if edu:
+        # Keyed widgets keep their old value over a new default, so clear the rows on screen
+        for i in range(max(len(edu), len(cv_data.get('education_entries') or []))):
+            for k in ('uni', 'col', 'deg', 'year'): st.session_state.pop(f"{k}_{i}", None)
+        cv_data['education_entries'] = [{k: as_text(e.get(k), " ") for k in ('uni', 'col', 'deg', 'year')} for e in edu]
+
+def generate_package(cv_data, jd):
+    # The letter only needs cv_data, so it runs alongside the resume; the ATS
+    # check starts the moment the resume text exists. Worker threads only call
+    # safe_generate (no st.* calls); results land in session state as they finish.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        jobs = {pool.submit(safe_generate, cover_letter_prompt(cv_data)): 'cover_letter'}
+        res = build_final_cv(cv_data)
+        if not res.startswith("Error") and jd: jobs[pool.submit(safe_generate, ats_prompt(res, jd, ats.score(res, jd).missing))] = 'ats_analysis'
+        for fut in as_completed(jobs):
+            out = fut.result()
+            if out.startswith("Error"): st.toast(out); continue
+            st.session_state[jobs[fut]] = out
+            st.toast("Cover letter ready" if jobs[fut] == 'cover_letter' else "ATS analysis ready")
+    return res
+
+def run_tailoring(cv_data, jds):
+    # Documents go straight into a ZIP on disk as each job finishes; the session
+    # keeps only the file path and the score table
+    path = zip_path(st.session_state.draft_id)
+    progress = st.progress(0.0, text=f"Tailoring 0/{len(jds)}...")
+    with open(path, "wb") as f, TailorZip(f, cv_data) as archive:
+        for done, r in enumerate(tailor_many(cv_data, jds, st.session_state.resume_sections, section_chat), 1):
+            archive.add(r); progress.progress(done / len(jds), text=f"Tailoring {done}/{len(jds)}: {r.title}")
+    st.session_state.tailor_zip = path
+    st.session_state.tailor_rows = [{'Job': i, 'Title': t, 'ATS Score': sc, 'Missing Keywords': m, 'Error': e} for i, t, sc, m, e in sorted(archive.rows)]
+
+def read_file(path):
+    # Deferred download data. Streamlit keeps whatever it is given (bytes or a file
+    # handle) in memory to serve the click, so the finished ZIP is held once here;
+    # only building it is memory-bounded (see export.iter_zip for true streaming)
+    with open(path, "rb") as f: return f.read()
 
 # ==========================================
-# 5. PROFESSIONAL PDF GENERATOR (MANUAL HEADER)
+# 4. RENDER CACHE (LAZY DOWNLOADS)
 # ==========================================
-class ProfessionalPDF(FPDF):
-    def header(self): pass 
-
-def create_pdf(text, user_data):
-    # Setup PDF
-    pdf = ProfessionalPDF(orientation='P', unit='mm', format='A4')
-    pdf.set_margins(left=10, top=10, right=10) 
-    pdf.add_page()
-    
-    try:
-        pdf.add_font('Amiri', '', FONT_PATH, uni=True)
-        pdf.add_font('Amiri-Bold', '', FONT_BOLD_PATH, uni=True)
-    except:
-        pdf.add_font('Arial', '', '', uni=True)
-
-    # ---------------------------------------------------------
-    # 1. PYTHON-GENERATED HEADER (100% Control - No AI Errors)
-    # ---------------------------------------------------------
-    # Name
-    pdf.set_font('Amiri-Bold', '', 24)
-    pdf.set_text_color(0, 0, 0)
-    name = user_data.get('name', 'Name')
-    pdf.cell(0, 10, process_text_for_pdf(name), ln=True, align='C')
-    
-    # Contact Info Construction
-    parts = []
-    if user_data.get('phone'): parts.append(user_data['phone'])
-    if user_data.get('city'): parts.append(user_data['city'])
-    if user_data.get('email'): parts.append(user_data['email'])
-    if user_data.get('linkedin'): parts.append(user_data['linkedin'])
-    if user_data.get('portfolio'): parts.append(user_data['portfolio'])
-    if user_data.get('github'): parts.append(user_data['github'])
-    
-    contact_line = " | ".join(parts)
-    
-    pdf.set_font('Amiri', '', 9)
-    pdf.set_text_color(0, 0, 0) # Black
-    pdf.multi_cell(0, 5, process_text_for_pdf(contact_line), align='C')
-    pdf.ln(3)
-    
-    # Line Separator
-    pdf.set_draw_color(0, 0, 0)
-    pdf.set_line_width(0.5)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    # ---------------------------------------------------------
-    # 2. AI-GENERATED BODY (Parsed Line by Line)
-    # ---------------------------------------------------------
-    lines = text.split('\n')
-    
-    for line in lines: 
-        line = line.strip()
-        if not line: continue
-        
-        # Remove markdown bold if AI adds it
-        clean_text = line.replace("**", "").replace("##", "")
-        display_line = process_text_for_pdf(clean_text)
-        
-        # --- HEADERS (### Section) ---
-        if "###" in line:
-            pdf.ln(4)
-            pdf.set_font('Amiri-Bold', '', 14)
-            clean_header = line.replace("###", "").strip().upper()
-            pdf.cell(0, 8, clean_header, ln=True, align='L')
-            
-            # Underline
-            pdf.set_line_width(0.5) 
-            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-            pdf.set_line_width(0.2)
-            pdf.ln(2)
-            
-        # --- SUB-HEADERS (Bold roles) ---
-        # Detect lines that look like "Role | Company" or have specific keywords
-        elif "|" in line and not line.startswith("-"):
-            pdf.ln(1)
-            pdf.set_font('Amiri-Bold', '', 11)
-            pdf.cell(0, 5, display_line, ln=True)
-            
-        # --- BULLET POINTS (Experience/Projects) ---
-        elif line.startswith("-") or line.startswith("•"):
-            pdf.set_font('Amiri', '', 10)
-            clean_bullet = line.replace("-", "").replace("•", "").strip()
-            pdf.set_x(12) 
-            pdf.multi_cell(188, 5, "• " + process_text_for_pdf(clean_bullet))
-            
-        # --- NORMAL TEXT (Summary/Skills) ---
-        else:
-            pdf.set_font('Amiri', '', 10)
-            pdf.multi_cell(0, 5, display_line)
-            pdf.ln(1)
-
-    buffer = io.BytesIO()
-    buffer.write(pdf.output(dest='S').encode("latin1"))
-    buffer.seek(0)
-    return buffer
-
-def create_docx(text, user_data):
-    doc = Document()
-    style = doc.styles['Normal']; style.font.name = 'Arial'; style.font.size = Pt(10)
-    
-    # 1. Python Header
-    head = doc.add_paragraph()
-    head.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    run = head.add_run(user_data.get('name', ''))
-    run.bold = True; run.font.size = Pt(22); run.font.color.rgb = RGBColor(0,0,0)
-    
-    # Contact
-    parts = [user_data.get(k) for k in ['phone','city','email','linkedin','portfolio','github'] if user_data.get(k)]
-    contact_p = doc.add_paragraph(" | ".join(parts))
-    contact_p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-    contact_p.runs[0].font.size = Pt(9)
-
-    # 2. Body
-    lines = text.split('\n')
-    for line in lines:
-        line = line.strip(); 
-        if not line: continue
-        clean_text = line.replace("**", "").replace("##", "").replace("###", "").strip()
-        
-        if "###" in line:
-            p = doc.add_paragraph(); p.paragraph_format.space_before = Pt(12)
-            run = p.add_run(clean_text.upper()); run.bold = True; run.font.size = Pt(14)
-        elif "|" in line and not line.startswith("-"):
-            p = doc.add_paragraph(); p.paragraph_format.space_before = Pt(6)
-            run = p.add_run(clean_text); run.bold = True
-        elif line.startswith("-") or line.startswith("•"):
-            doc.add_paragraph(clean_text.replace("-", "").replace("•", "").strip(), style='List Bullet')
-        else:
-            doc.add_paragraph(clean_text)
-            
-    buffer = io.BytesIO(); doc.save(buffer); buffer.seek(0)
-    return buffer
+HEADER_FIELDS = ('name', 'phone', 'city', 'email', 'linkedin', 'portfolio', 'github')
+
+def header_fields(user_data):
+    # Only the fields the renderers actually print take part in the cache key
+    return tuple((k, user_data.get(k) or '') for k in HEADER_FIELDS)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_document(fmt, text, header):
+    # Keyed by a content hash of (fmt, text, header); returns raw bytes
+    return RENDERERS[fmt](text, dict(header)).getvalue()
+
+def lazy_document(fmt, text, user_data):
+    # Deferred download data: nothing is rendered until the button is clicked
+    return functools.partial(render_document, fmt, text, header_fields(user_data))
 
 # ==========================================
-# 6. SESSION INIT
+# 5. SESSION INIT
 # ==========================================
+# The draft id lives in the URL (?draft=...), so a reload or a server restart
+# restores the session in one read instead of starting over (drafts are per host)
+DRAFT_ID_RE = re.compile(r"[0-9a-f]{32}")
+draft_store = get_store()
+if 'draft_id' not in st.session_state:
+    draft_id = st.query_params.get("draft", "")
+    blobs = {}
+    if DRAFT_ID_RE.fullmatch(draft_id):
+        with metrics.span("drafts.load"): blobs = draft_store.load(draft_id)
+        if blobs:
+            cv_data, extras = to_session(decode_sections(blobs))
+            st.session_state.cv_data = cv_data
+            for k, v in extras.items(): st.session_state[k] = v
+    else:
+        draft_id = uuid.uuid4().hex
+        st.query_params["draft"] = draft_id
+    st.session_state.draft_id = draft_id
+    st.session_state.draft_hashes = section_hashes(blobs)
 if 'step' not in st.session_state: st.session_state.step = 1
 if 'cv_data' not in st.session_state: st.session_state.cv_data = {}
 if 'education_entries' not in st.session_state.cv_data: st.session_state.cv_data['education_entries'] = [{'uni': '', 'col': '', 'deg': '', 'year': ''}]
@@ -239,11 +237,25 @@ if 'cert_entries' not in st.session_state.cv_data: st.session_state.cv_data['cer
 if 'vol_entries' not in st.session_state.cv_data: st.session_state.cv_data['vol_entries'] = []
 for k in ['final_cv', 'cover_letter', 'ats_analysis']:
     if k not in st.session_state: st.session_state[k] = ""
+if 'resume_sections' not in st.session_state: st.session_state.resume_sections = {}
+if 'resume_failure' not in st.session_state: st.session_state.resume_failure = None  # (stale section keys, error message)
+if 'tailor_rows' not in st.session_state: st.session_state.tailor_zip = ""; st.session_state.tailor_rows = []
 def next_step(): st.session_state.step += 1
 def prev_step(): st.session_state.step -= 1
 
+ENTRY_WIDGET_RE = re.compile(r"(uni|col|deg|year|pj_[tld]|ct_[ta]|vl_[rod])_\d+")
+
+def start_new_draft():
+    # A fresh draft id, so the previous draft stays restorable from its own link. Everything
+    # from the previous candidate is cleared first, or the next save would copy it into the new draft
+    for k in [k for k in st.session_state if ENTRY_WIDGET_RE.fullmatch(k) or k == "multi_jd_text"]: del st.session_state[k]
+    remove_zip(st.session_state.tailor_zip); st.session_state.tailor_zip = ""; st.session_state.tailor_rows = []
+    st.session_state.step = 1; st.session_state.cv_data = {}; st.session_state.resume_sections = {}; st.session_state.resume_failure = None
+    for k in ['final_cv', 'cover_letter', 'ats_analysis']: st.session_state[k] = ""
+    st.session_state.draft_id = st.query_params["draft"] = uuid.uuid4().hex; st.session_state.draft_hashes = {}
+
 # ==========================================
-# 7. MAIN UI
+# 6. MAIN UI
 # ==========================================
 st.title("🚀 Elite CV Builder")
 if st.session_state.step < 6: st.progress(st.session_state.step / 6)
@@ -251,6 +263,14 @@ if st.session_state.step < 6: st.progress(st.session_state.step / 6)
 # STEP 1
 if st.session_state.step == 1:
     st.header("1️⃣ Personal Info")
+    with st.expander("📄 Import an existing CV (PDF / Word)"):
+        upload = st.file_uploader("Upload CV", type=["pdf", "docx"])
+        if upload and st.button("Auto-fill from CV"):
+            data = upload.getvalue()
+            try:
+                with st.spinner("Reading CV..."): parsed = import_resume(hashlib.sha256(data).hexdigest(), upload.name, data)
+            except Exception as e: st.error(str(e))
+            else: apply_imported_profile(st.session_state.cv_data, parsed); st.rerun()
     with st.form("s1"):
         c1, c2 = st.columns(2)
         with c1: 
@@ -303,7 +323,9 @@ elif st.session_state.step == 3:
     with c_in: role = st.text_input("Role Title", value=st.session_state.cv_data.get('target_title', ''), label_visibility='collapsed')
     with c_bt:
         if st.button("Get Suggestions 🧠", use_container_width=True):
-            with st.spinner("..."): sugg = get_job_suggestions(role); st.session_state.cv_data['raw_experience'] = st.session_state.cv_data.get('raw_experience', '') + "\n" + sugg; st.rerun()
+            with st.spinner("..."): sugg = get_job_suggestions(role)
+            if sugg.startswith("Error"): st.error(sugg)
+            else: st.session_state.cv_data['raw_experience'] = st.session_state.cv_data.get('raw_experience', '') + "\n" + sugg; st.rerun()
     with st.form("s3"):
         exp = st.text_area("Experience:", st.session_state.cv_data.get('raw_experience', ''), height=200)
         c1, c2 = st.columns([1, 5]); 
@@ -361,95 +383,83 @@ elif st.session_state.step == 5:
 elif st.session_state.step == 6:
     st.success("✅ CV Generated Successfully")
     raw_name = st.session_state.cv_data.get('name', 'User')
-    safe_name = "".join([c if c.isalnum() or c==" " else "_" for c in raw_name]).strip().replace(" ", "_") or "CV"
-    t1, t2, t3 = st.tabs(["Resume", "Cover Letter", "ATS Score"])
+    safe_name = safe_filename(raw_name)
+    t1, t2, t3, t4 = st.tabs(["Resume", "Cover Letter", "ATS Score", "Multiple Jobs"])
     jd = st.session_state.cv_data.get('target_job', '')
     
     with t1:
-        if not st.session_state.final_cv:
-            with st.spinner("Compiling Resume..."):
-                # Education Loop
-                edu_lines = []
-                for e in st.session_state.cv_data['education_entries']:
-                    if e.get('uni') or e.get('col'):
-                        parts = [x for x in [e.get('deg'), e.get('col'), e.get('uni')] if x]
-                        line = ", ".join(parts)
-                        if e.get('year'): line += f" | {e.get('year')}"
-                        edu_lines.append(f"- {line}")
-                edu_block = "### EDUCATION\n" + "\n".join(edu_lines) if edu_lines else ""
-
-                # Projects
-                proj_lines = []
-                for p in st.session_state.cv_data['project_entries']:
-                    if p.get('title'):
-                        head = p['title']
-                        if p.get('link'): head += f" | {p['link']}"
-                        proj_lines.append(f"{head}\n- {p.get('desc','')}") # Force bullet for desc
-                proj_block = "### PROJECTS\n" + "\n".join(proj_lines) + "\n" if proj_lines else ""
-
-                # Certs & Vol
-                cert_lines = [f"- {c['title']} | {c.get('auth','')}" for c in st.session_state.cv_data['cert_entries'] if c.get('title')]
-                cert_block = "### CERTIFICATIONS\n" + "\n".join(cert_lines) + "\n" if cert_lines else ""
-                vol_lines = [f"{v['role']} | {v.get('org','')}\n- {v.get('desc','')}" for v in st.session_state.cv_data['vol_entries'] if v.get('role')]
-                vol_block = "### VOLUNTEERING\n" + "\n".join(vol_lines) + "\n" if vol_lines else ""
-                
-                # Fixed: Languages in one line
-                langs = f"### LANGUAGES\n{st.session_state.cv_data['languages']}" if st.session_state.cv_data.get('languages') else ""
-
-                # PROMPT FIX: Force Bullet Points & Clean Structure
-                prompt = f"""
-                Act as a Resume Expert. Rewrite in Professional ENGLISH.
-                
-                CRITICAL RULES:
-                1. **NO HEADER:** Do NOT output name/contact info. Start directly with Professional Summary.
-                2. **EXPERIENCE:** Convert ALL experience descriptions into **BULLET POINTS** (- ). Do NOT use paragraphs.
-                3. **METRICS:** Add realistic numbers/percentages to every bullet point.
-                4. **ORDER:** Sort Experience REVERSE CHRONOLOGICAL (Newest First).
-                5. **FORMAT:** Use "### " for Section Headers.
-                6. **SKILLS/LANGUAGES:** Keep them as a comma-separated list in one paragraph.
-                
-                DATA TO PROCESS:
-                
-                ### PROFESSIONAL SUMMARY
-                (Summary for {st.session_state.cv_data['target_title']})
-                
-                ### TECHNICAL SKILLS
-                {st.session_state.cv_data['skills']}
-                
-                ### EXPERIENCE
-                {st.session_state.cv_data['raw_experience']}
-                
-                {edu_block}
-                {proj_block}
-                {cert_block}
-                {vol_block}
-                {langs}
-                """
-                res = safe_generate(prompt)
-                if "Error" in res: st.error(res)
-                else: st.session_state.final_cv = res; st.rerun()
+        stale = stale_sections(resume_sections(st.session_state.cv_data), st.session_state.resume_sections)
+        attempt = tuple(section_key(s) for s in stale)
+        failure = st.session_state.resume_failure
+        if failure and failure[0] == attempt:
+            # Same inputs already failed: wait for an edit or an explicit retry instead of re-calling the model on every rerun
+            st.error(failure[1])
+            if st.button("Retry"): st.session_state.resume_failure = None; st.rerun()
+        elif not st.session_state.final_cv or stale:
+            with st.spinner("Compiling Resume..." if not st.session_state.final_cv else "Updating " + ", ".join(s.title.title() for s in stale) + "..."):
+                res = generate_package(st.session_state.cv_data, jd) if full_package else build_final_cv(st.session_state.cv_data)
+                if res.startswith("Error"): st.session_state.resume_failure = (attempt, res); st.error(res)
+                else: st.session_state.final_cv = res; st.session_state.resume_failure = None; st.rerun()
 
         if st.session_state.final_cv:
             st.text_area("Editor", st.session_state.final_cv, height=500)
-            c1, c2, c3 = st.columns(3)
+            c1, c2, c3, c4 = st.columns(4)
             # Pass user_data to create_pdf for the manual header
-            c1.download_button("PDF", create_pdf(st.session_state.final_cv, st.session_state.cv_data), f"{safe_name}.pdf", "application/pdf")
-            c2.download_button("Word", create_docx(st.session_state.final_cv, st.session_state.cv_data), f"{safe_name}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
-            if c3.button("Reset"): st.session_state.final_cv=""; st.rerun()
+            c1.download_button("PDF", lazy_document('pdf', st.session_state.final_cv, st.session_state.cv_data), f"{safe_name}.pdf", "application/pdf")
+            c2.download_button("Word", lazy_document('docx', st.session_state.final_cv, st.session_state.cv_data), f"{safe_name}.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+            if c3.button("Reset"): st.session_state.final_cv = ""; st.session_state.resume_sections = {}; st.session_state.resume_failure = None; st.rerun()
+            # Edits made from here only regenerate the sections they touch
+            if c4.button("Edit Details"): st.session_state.step = 5; st.rerun()
 
     with t2:
         if st.button("Generate Letter"):
-            with st.spinner("..."): st.session_state.cover_letter = safe_generate(f"Write English Cover Letter for {st.session_state.cv_data['name']}, Role: {st.session_state.cv_data['target_title']}")
-            st.rerun()
-        if st.session_state.cover_letter: st.text_area("Letter", st.session_state.cover_letter); st.download_button("Download", create_docx(st.session_state.cover_letter, st.session_state.cv_data), "Cover.docx")
+            with st.spinner("..."): letter = generate_live(cover_letter_prompt(st.session_state.cv_data))
+            if letter.startswith("Error"): st.error(letter)
+            else: st.session_state.cover_letter = letter; st.rerun()
+        if st.session_state.cover_letter: st.text_area("Letter", st.session_state.cover_letter); st.download_button("Download", lazy_document('docx', st.session_state.cover_letter, st.session_state.cv_data), "Cover.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
 
     with t3:
-        if st.button("ATS Check"):
-            if not jd: st.warning("No Job Description found!")
-            else:
-                with st.spinner("Analyzing..."): ats_res = safe_generate(f"Analyze CV against JD:\n\nCV:{st.session_state.final_cv}\n\nJD:{jd}\n\nOutput: Score/100, Missing Keywords, Tips.")
-                st.session_state.ats_analysis = ats_res; st.rerun()
-        if st.session_state.ats_analysis: st.info("ATS Result:"); st.write(st.session_state.ats_analysis)
+        if not jd: st.warning("No Job Description found!")
+        elif st.session_state.final_cv:
+            # Local, deterministic score: milliseconds, no API call
+            result = ats.score(st.session_state.final_cv, jd)
+            st.metric("ATS Score", f"{result.score}/100")
+            if result.missing: st.markdown("**Missing Keywords:** " + ", ".join(result.missing))
+            if result.matched: st.caption("Matched: " + ", ".join(result.matched))
+            if st.button("Get AI Tips"):
+                with st.spinner("Analyzing..."): ats_res = generate_live(ats_prompt(st.session_state.final_cv, jd, result.missing))
+                if ats_res.startswith("Error"): st.error(ats_res)
+                else: st.session_state.ats_analysis = ats_res; st.rerun()
+        if st.session_state.ats_analysis: st.info("AI Tips:"); st.write(st.session_state.ats_analysis)
+
+    with t4:
+        st.caption(f"Tailor this CV to up to {MAX_JOBS} postings at once: paste them separated by a line containing only ---, or upload .txt files.")
+        jd_text = st.text_area("Job Descriptions", height=250, key="multi_jd_text")
+        jd_files = st.file_uploader("Job description files", type=["txt"], accept_multiple_files=True)
+        jds = (split_jds(jd_text) + [f.getvalue().decode("utf-8", "ignore").strip() for f in jd_files or []])[:MAX_JOBS]
+        if st.button(f"Tailor to {len(jds)} Jobs", disabled=not jds):
+            run_tailoring(st.session_state.cv_data, jds); st.rerun()
+        if st.session_state.tailor_rows:
+            st.dataframe(st.session_state.tailor_rows, hide_index=True)
+            if os.path.exists(st.session_state.tailor_zip):
+                st.download_button("Download ZIP", functools.partial(read_file, st.session_state.tailor_zip), f"{safe_name}_Tailored.zip", "application/zip")
 
     st.markdown("---"); 
-    if st.button("Start Over"): st.session_state.step = 1; st.session_state.cv_data = {}; st.session_state.final_cv = ""; st.rerun()
+    if st.button("Start Over"): start_new_draft(); st.rerun()
+
+# Persist only the sections edited during this run
+with metrics.span("drafts.save") as info:
+    st.session_state.draft_hashes, changed = draft_store.save(st.session_state.draft_id, encode_sections(from_session(st.session_state.cv_data, st.session_state)), st.session_state.draft_hashes)
+    info['sections'] = len(changed)
+
+# ==========================================
+# 7. PERFORMANCE PANEL
+# ==========================================
+if show_metrics:
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        rows = metrics.summary()
+        if rows: st.dataframe(rows, hide_index=True)
+        else: st.caption("No timings recorded yet.")
+        events = metrics.recent_events(20)
+        if events: st.caption("Recent events"); st.dataframe(events[::-1], hide_index=True)
+        st.download_button("Export (Prometheus)", metrics.prometheus_text(), "cv_builder.prom", "text/plain")
@@ -0,0 +1,178 @@
+import re
+from collections import Counter, namedtuple
+import numpy as np
+
+# ==========================================
+# LOCAL ATS SCORER
+# ==========================================
+# Deterministic keyword-overlap score between a CV and a job description.
+# The JD is reduced to weighted keywords: known skills (matched against a
+# vocabulary index built once at import, up to 3-word phrases) get a boost,
+# other content words count once. Term frequency in the JD is saturated the
+# way BM25 does it, so a word repeated ten times is not worth ten skills.
+# The score is the share of that keyword weight the CV covers, 0-100.
+K1 = 1.2            # BM25 term-frequency saturation
+SKILL_BOOST = 3.0   # weight multiplier for vocabulary skills
+MAX_GENERIC = 30    # non-skill JD terms kept (highest frequency first)
+MAX_PHRASE = 3
+
+AtsResult = namedtuple('AtsResult', 'score matched missing')
+
+SKILLS = (
+    # languages
+    "python", "java", "javascript", "typescript", "c++", "c#", "golang", "rust", "ruby", "php", "kotlin",
+    "swift", "scala", "matlab", "sql", "bash", "shell scripting", "perl", "dart", "objective-c", "vba",
+    # web & frameworks
+    "html", "css", "sass", "react", "react native", "angular", "vue", "next.js", "node.js", "express", "django",
+    "flask", "fastapi", "spring", "spring boot", "laravel", "rails", ".net", "asp.net", "graphql",
+    "rest api", "restful api", "microservices", "redux", "tailwind", "bootstrap", "jquery", "webpack", "flutter",
+    # data & ml
+    "machine learning", "deep learning", "data science", "data analysis", "data analytics", "data engineering",
+    "data visualization", "data modeling", "data warehousing", "big data", "statistics", "nlp",
+    "natural language processing", "computer vision", "llm", "generative ai", "prompt engineering",
+    "pandas", "numpy", "scikit-learn", "tensorflow", "pytorch", "keras", "spark", "pyspark", "hadoop", "airflow",
+    "dbt", "etl", "power bi", "tableau", "looker", "excel", "a/b testing", "time series", "forecasting",
+    "recommendation systems", "mlops", "feature engineering", "hugging face", "langchain", "opencv",
+    # databases
+    "postgresql", "mysql", "sqlite", "mongodb", "redis", "elasticsearch", "cassandra", "dynamodb", "oracle",
+    "sql server", "snowflake", "bigquery", "redshift", "nosql", "firebase",
+    # cloud & devops
+    "aws", "azure", "gcp", "google cloud", "docker", "kubernetes", "terraform", "ansible", "jenkins",
+    "github actions", "gitlab ci", "ci/cd", "linux", "git", "devops", "serverless", "lambda", "ec2", "s3",
+    "cloudformation", "helm", "prometheus", "grafana", "nginx", "kafka", "rabbitmq", "site reliability",
+    "monitoring", "observability", "networking", "cybersecurity", "penetration testing", "siem", "iam",
+    # practice & process
+    "agile", "scrum", "kanban", "jira", "confluence", "tdd", "unit testing", "integration testing",
+    "test automation", "selenium", "cypress", "jest", "pytest", "code review", "system design",
+    "object-oriented programming", "oop", "design patterns", "api design", "distributed systems",
+    "performance optimization", "scalability", "security", "accessibility", "seo",
+    # product, business & soft skills
+    "project management", "product management", "stakeholder management", "risk management",
+    "requirements gathering", "business analysis", "financial analysis", "financial modeling", "budgeting",
+    "accounting", "auditing", "crm", "salesforce", "sap", "erp", "digital marketing",
+    "content marketing", "social media", "copywriting", "market research", "customer service",
+    "customer success", "sales", "negotiation", "leadership", "team leadership", "mentoring", "communication",
+    "presentation", "problem solving", "critical thinking", "teamwork", "collaboration", "time management",
+    "figma", "ui/ux", "ux design", "ui design", "user research", "wireframing", "prototyping", "photoshop",
+    "illustrator", "autocad", "solidworks", "six sigma", "supply chain", "logistics", "procurement",
+    "recruitment", "onboarding", "training", "english", "arabic", "french", "german", "spanish",
+)
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have having he
+her here hers him his how i if in into is it its itself just least less like may me might more most must my no
+nor not of off on once only or other our ours out over own per plus same shall she should so some such than that
+the their theirs them then there these they this those through to too under until up upon us very via was we
+were what when where which while who whom why will with within without would you your yours
+ability able apply applicant candidate candidates company including join looking new opportunity preferred
+required requirement requirements responsibilities role strong team work working year years experience
+excellent good great knowledge skill skills well related relevant using use based nice bonus must-have
+""".split())
+
+# Keeps "c++", "c#", "node.js" whole, and a leading dot at a word start (".net" is not "net");
+# "/" and "-" split ("ci/cd" is matched as a 2-word phrase)
+TOKEN_RE = re.compile(r"(?<![a-z0-9])\.?(?:[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9][+#]*)")
+SUFFIXES = (("ational", "ate"), ("ization", "ize"), ("ations", "ate"), ("ation", "ate"), ("ies", "y"),
+            ("ing", ""), ("ness", ""), ("ments", ""), ("ment", ""), ("ers", "er"), ("ed", ""), ("s", ""))
+
+
+def stem(word):
+    # Small deterministic suffix stripper; tokens with symbols (c++, node.js) are left alone
+    if not word.isalpha() or len(word) <= 3: return word
+    for suf, rep in SUFFIXES:
+        if word.endswith(suf) and len(word) - len(suf) >= 3:
+            if suf == "s" and (word.endswith(("ss", "us")) or (word.endswith("is") and len(word) > 4)): return word
+            return word[:-len(suf)] + rep
+    return word
+
+
+def tokenize(text):
+    # Yields (stem, surface) pairs
+    for tok in TOKEN_RE.findall((text or "").lower()):
+        yield stem(tok), tok
+
+
+def _build_index(skills):
+    index = {}
+    for skill in skills:
+        key = tuple(stem(t) for t in TOKEN_RE.findall(skill.lower()))
+        if key: index.setdefault(key, skill)
+    return index
+
+SKILL_INDEX = _build_index(SKILLS)  # built once per process
+
+
+def extract_terms(text):
+    # Returns Counter of term -> frequency and term -> display form.
+    # Skill phrases are matched greedily (longest first) so "machine learning"
+    # is one term rather than "machine" + "learning".
+    toks = list(tokenize(text)); counts, display = Counter(), {}
+    i = 0
+    while i < len(toks):
+        for n in range(min(MAX_PHRASE, len(toks) - i), 0, -1):
+            skill = SKILL_INDEX.get(tuple(s for s, _ in toks[i:i + n]))
+            if skill:
+                counts["skill:" + skill] += 1; display["skill:" + skill] = skill; i += n; break
+        else:
+            s, surface = toks[i]; i += 1
+            if surface in STOPWORDS or s in STOPWORDS or len(s) < 3 or s.isdigit(): continue
+            counts[s] += 1; display.setdefault(s, surface)
+    return counts, display
+
+
+def jd_keywords(jd_text):
+    # term -> weight, term -> display form
+    counts, display = extract_terms(jd_text)
+    skills = [t for t in counts if t.startswith("skill:")]
+    generic = sorted((t for t in counts if not t.startswith("skill:")), key=lambda t: (-counts[t], t))[:MAX_GENERIC]
+    weights = {}
+    for t in skills + generic:
+        tf = counts[t]
+        weights[t] = (SKILL_BOOST if t.startswith("skill:") else 1.0) * tf * (K1 + 1) / (tf + K1)
+    return weights, display
+
+
+def top_keywords(jd_text, n=15):
+    # Highest-weighted JD terms in display form, skills first by weight
+    weights, display = jd_keywords(jd_text)
+    return [display[t] for t in sorted(weights, key=lambda t: (-weights[t], t))[:n]]
+
+
+def score(cv_text, jd_text):
+    weights, display = jd_keywords(jd_text)
+    cv_terms = set(extract_terms(cv_text)[0])
+    total = sum(weights.values())
+    if not total: return AtsResult(0, [], [])
+    ranked = sorted(weights, key=lambda t: (-weights[t], t))
+    matched = [display[t] for t in ranked if t in cv_terms]
+    missing = [display[t] for t in ranked if t not in cv_terms]
+    return AtsResult(round(100 * sum(weights[t] for t in weights if t in cv_terms) / total), matched, missing)
+
+
+# ==========================================
+# BATCH SCORING
+# ==========================================
+def score_matrix(cv_texts, jd_texts):
+    # (n_cv x n_jd) score matrix in one matrix product: CV term presence x JD keyword weights
+    jd_parts = [jd_keywords(jd)[0] for jd in jd_texts]
+    vocab = {t: i for i, t in enumerate(sorted({t for w in jd_parts for t in w}))}
+    W = np.zeros((len(jd_parts), len(vocab)))
+    for j, w in enumerate(jd_parts):
+        for t, v in w.items(): W[j, vocab[t]] = v
+    P = np.zeros((len(cv_texts), len(vocab)))
+    for i, cv in enumerate(cv_texts):
+        cols = [vocab[t] for t in extract_terms(cv)[0] if t in vocab]
+        P[i, cols] = 1.0
+    totals = W.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(totals > 0, 100 * (P @ W.T) / totals, 0.0)
+    return np.rint(scores).astype(int)
+
+
+def score_one_against_many(cv_text, jd_texts):
+    return score_matrix([cv_text], jd_texts)[0]
+
+
+def score_many_against_one(cv_texts, jd_text):
+    return score_matrix(cv_texts, [jd_text])[:, 0]
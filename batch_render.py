@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from renderer import RENDERERS, safe_filename
+
+# ==========================================
+# HEADLESS BATCH RENDERER
+# ==========================================
+# Renders final CV markdown to PDF/DOCX without the Streamlit wizard.
+#
+# Input is either a JSONL file (one record per line) or a directory of
+# *.json files. Each record looks like:
+#     {"id": "jane-doe", "cv_data": {"name": ..., "email": ...}, "final_cv": "### PROFESSIONAL SUMMARY..."}
+# "id" is optional (defaults to the line number / file name). Output files are
+# named after the id plus a short hash of it, so ids that sanitise to the same
+# name ("jane.doe", "jane_doe") never share a file; ids must be unique.
+#
+#     python batch_render.py candidates.jsonl out/ --formats pdf docx --workers 8
+#
+# Every finished item is appended to out/_manifest.jsonl; re-running the same
+# command skips items already rendered in the requested formats, so a crashed
+# run resumes where it stopped.
+MANIFEST_NAME = "_manifest.jsonl"
+
+
+def iter_sources(source):
+    # Yields (item_id, kind, payload) lazily; payload is a raw line or a file path,
+    # so the parent process never holds more than the in-flight window in memory.
+    if os.path.isdir(source):
+        for fname in sorted(os.listdir(source)):
+            if fname.endswith(".json"): yield os.path.splitext(fname)[0], 'file', os.path.join(source, fname)
+        return
+    with open(source, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip(): continue
+            try: item_id = str(json.loads(line).get('id') or lineno)
+            except (ValueError, AttributeError): item_id = str(lineno)
+            yield item_id, 'line', line
+
+
+def load_done(out_dir):
+    # item id -> formats already rendered successfully
+    path = os.path.join(out_dir, MANIFEST_NAME); done = {}
+    if not os.path.exists(path): return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try: entry = json.loads(line)
+            except ValueError: continue  # torn last line after a crash
+            if entry.get('status') == 'ok':
+                done.setdefault(entry['id'], set()).update(os.path.splitext(o)[1][1:] for o in entry['outputs'])
+    return done
+
+
+def output_stem(item_id):
+    digest = hashlib.sha1(item_id.encode("utf-8")).hexdigest()[:8]
+    return f"{safe_filename(item_id)}-{digest}"
+
+
+def render_item(item_id, kind, payload, out_dir, formats):
+    # Runs inside a worker process; writes files itself and only returns a small status dict
+    try:
+        if kind == 'file':
+            with open(payload, encoding="utf-8") as f: record = json.load(f)
+        else: record = json.loads(payload)
+        cv_data = record.get('cv_data') or {}
+        text = record.get('final_cv') or ''
+        if not text.strip(): raise ValueError("record has no final_cv text")
+        outputs = []
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{output_stem(item_id)}.{fmt}")
+            # Private temp file: never leave a truncated document under the final name
+            fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as f: RENDERERS[fmt](text, cv_data, f)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp): os.remove(tmp)
+            outputs.append(os.path.basename(path))
+        return {'id': item_id, 'status': 'ok', 'outputs': outputs}
+    except Exception as e:
+        return {'id': item_id, 'status': 'error', 'error': f"{type(e).__name__}: {e}", 'trace': traceback.format_exc(limit=3)}
+
+
+def run_batch(source, out_dir, formats=('pdf', 'docx'), workers=None, max_in_flight=None, max_tasks_per_child=200):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    done = load_done(out_dir)
+    stats = {'ok': 0, 'error': 0, 'skipped': 0}
+    seen = set()
+    with open(os.path.join(out_dir, MANIFEST_NAME), "a", encoding="utf-8") as manifest, \
+         ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child) as pool:
+        pending = set()
+
+        def record(entry):
+            stats[entry['status']] += 1
+            manifest.write(json.dumps(entry) + "\n"); manifest.flush()
+            if entry['status'] == 'error': print(f"[error] {entry['id']}: {entry['error']}", file=sys.stderr)
+
+        def drain(block_until):
+            nonlocal pending
+            while len(pending) > block_until:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished: record(fut.result())
+
+        for item_id, kind, payload in iter_sources(source):
+            if item_id in seen:  # would overwrite the earlier record's files
+                record({'id': item_id, 'status': 'error', 'error': "duplicate id in input"}); continue
+            seen.add(item_id)
+            if set(formats) <= done.get(item_id, set()): stats['skipped'] += 1; continue
+            pending.add(pool.submit(render_item, item_id, kind, payload, out_dir, tuple(formats)))
+            drain(max_in_flight - 1)  # bounded window: back-pressure on the reader
+        drain(0)
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render CV records to PDF/DOCX in parallel.")
+    ap.add_argument("source", help="JSONL file or directory of .json records")
+    ap.add_argument("out_dir", help="Output directory (also holds the resume manifest)")
+    ap.add_argument("--formats", nargs="+", choices=sorted(RENDERERS), default=['pdf', 'docx'])
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    ap.add_argument("--max-in-flight", type=int, default=None, help="Queued items cap (default: 4 x workers)")
+    args = ap.parse_args(argv)
+    stats = run_batch(args.source, args.out_dir, args.formats, args.workers, args.max_in_flight)
+    print(f"done: {stats['ok']} ok, {stats['error']} failed, {stats['skipped']} skipped (already rendered)")
+    return 1 if stats['error'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
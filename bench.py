@@ -0,0 +1,221 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import functools
+import platform
+import tracemalloc
+from markup import parse_cv
+from renderer import create_pdf, create_docx, process_text_for_pdf, _shape_rtl
+from extract import IMPORT_CHAR_BUDGET, extract_text_from_pdf, extract_text_from_docx
+from prompts import resume_sections
+from sections import build_resume
+from export import iter_zip
+import ats
+import fonts
+
+# ==========================================
+# OFFLINE PERFORMANCE BENCHMARKS
+# ==========================================
+# Times the hot paths on synthetic CVs (1-20 pages, English and Arabic) with a
+# stub LLM, so no network or API key is needed:
+#
+#     python bench.py                       # run and print a report
+#     python bench.py --save-baseline       # store results in bench_baseline.json
+#     python bench.py --compare             # fail (exit 1) if p50 regressed vs the baseline
+#
+# Set CV_FONT_DIR to a folder with the Amiri fonts for the PDF cases; without
+# them those cases are skipped. Inputs are only built for the selected cases.
+BASELINE_PATH = "bench_baseline.json"
+PAGES = (1, 5, 20)
+LINES_PER_PAGE = 45
+STUB_LATENCY = 0.02  # seconds per stub LLM call, so skipped regenerations show up in the timings
+
+LTR_BULLETS = (
+    "Designed and shipped a full-stack analytics platform used by 12,000 monthly users",
+    "Reduced API latency by 38% by introducing Redis caching and query batching",
+    "Led a team of 5 engineers through the migration to Kubernetes with zero downtime",
+    "Automated CI/CD pipelines with GitHub Actions, cutting release time from 2 days to 3 hours",
+)
+RTL_BULLETS = (
+    "صممت منصة تحليلات متكاملة يستخدمها 12,000 مستخدم شهريا",
+    "خفضت زمن الاستجابة بنسبة 38% عبر التخزين المؤقت وتجميع الاستعلامات",
+    "قدت فريقا من 5 مهندسين أثناء الانتقال إلى Kubernetes دون توقف",
+    "أتمتة خطوط النشر المستمر مما قلل زمن الإصدار من يومين إلى 3 ساعات",
+)
+
+
+# ==========================================
+# SYNTHETIC INPUTS
+# ==========================================
+def synthetic_cv(pages, rtl=False):
+    bullets = RTL_BULLETS if rtl else LTR_BULLETS
+    lines = ["### PROFESSIONAL SUMMARY", bullets[0] + ". " + bullets[1] + ".", "### TECHNICAL SKILLS",
+             "Python, Django, PostgreSQL, Docker, Kubernetes, AWS, Redis, React, CI/CD", "### EXPERIENCE"]
+    role = 0
+    while len(lines) < pages * LINES_PER_PAGE:
+        role += 1
+        lines.append(f"Senior Engineer | Company {role} | {2024 - role}")
+        lines.extend(f"- {bullets[(role + i) % len(bullets)]}" for i in range(6))
+    lines += ["### EDUCATION", "- BSc Computer Science, Cairo University | 2016", "### LANGUAGES", "Arabic, English"]
+    return "\n".join(lines)
+
+
+def synthetic_cv_data(pages):
+    experience = "\n".join(f"Engineer at Company {i}\n" + "\n".join(f"- {b}" for b in LTR_BULLETS) for i in range(pages * 4))
+    return {
+        'name': "Jane Doe", 'email': "jane@example.com", 'phone': "+20 100 000 0000", 'city': "Cairo",
+        'linkedin': "linkedin.com/in/jane", 'target_title': "Senior Backend Engineer",
+        'skills': "Python, Django, PostgreSQL, Docker, Kubernetes, AWS", 'languages': "Arabic, English",
+        'raw_experience': experience + "\n" + experience,  # suggestions appended twice, as in real sessions
+        'education_entries': [{'uni': "Cairo University", 'col': "Engineering", 'deg': "BSc", 'year': "2016"}],
+        'project_entries': [{'title': f"Project {i}", 'link': "", 'desc': LTR_BULLETS[i % 4]} for i in range(pages)],
+        'cert_entries': [{'title': "AWS Solutions Architect", 'auth': "Amazon"}], 'vol_entries': [],
+        'target_job': "Senior Python engineer with Django, PostgreSQL, AWS, Kubernetes, Kafka and CI/CD experience.",
+    }
+
+
+class StubLLM:
+    # Stands in for LLMClient: returns a canned resume after a fixed delay and counts calls
+    def __init__(self, pages, latency=STUB_LATENCY):
+        self.reply = synthetic_cv(pages); self.latency = latency; self.calls = 0
+    def chat(self, prompt):
+        self.calls += 1; time.sleep(self.latency)
+        return self.reply
+
+
+USER = {'name': "Jane Doe", 'email': "jane@example.com", 'phone': "+20 100 000 0000", 'city': "Cairo"}
+
+
+# ==========================================
+# MEASUREMENT
+# ==========================================
+def percentile(sorted_vals, q):
+    if not sorted_vals: return 0.0
+    k = (len(sorted_vals) - 1) * q; lo = int(k); hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def measure(fn, iterations, pages=1, llm=None):
+    # With `llm` (a StubLLM) the result also reports model calls per run
+    fn()  # warm-up (imports, font registry, first-call caches)
+    calls = llm.calls if llm else 0
+    times = []
+    for _ in range(iterations):
+        t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+    llm_calls = (llm.calls - calls) / iterations if llm else None
+    tracemalloc.start(); fn(); peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+    times.sort(); mean = sum(times) / len(times)
+    return {
+        'p50_ms': round(percentile(times, 0.50) * 1000, 3), 'p90_ms': round(percentile(times, 0.90) * 1000, 3),
+        'p99_ms': round(percentile(times, 0.99) * 1000, 3), 'peak_kb': round(peak / 1024, 1),
+        'docs_per_s': round(1 / mean, 2) if mean else 0.0, 'pages_per_s': round(pages / mean, 2) if mean else 0.0,
+        'llm_calls': llm_calls,
+    }
+
+
+def build_cases(pages_list, selected=lambda name: True):
+    # Returns ({name: (fn, pages[, llm])}, skipped_names); a case's inputs are
+    # only built when `selected` picks it, and PDF cases need the Amiri fonts
+    cases, skipped = {}, []
+    pdf_ok = functools.cache(lambda: all(fonts.font_path(f) for f in fonts.FONT_SOURCES))
+
+    def add(name, make, needs_pdf=False):
+        if not selected(name): return
+        if needs_pdf and not pdf_ok(): skipped.append(name); return
+        cases[name] = make()
+
+    for pages in pages_list:
+        for rtl in (False, True):
+            tag = f"{pages}p-{'ar' if rtl else 'en'}"
+            text = synthetic_cv(pages, rtl)
+            pdf_bytes = functools.cache(lambda text=text: create_pdf(text, USER).getvalue())
+            docx_bytes = functools.cache(lambda text=text: create_docx(text, USER).getvalue())
+
+            def run_parse(text=text): parse_cv.__wrapped__(text)
+            def run_bidi(text=text):
+                _shape_rtl.cache_clear()
+                for line in text.split("\n"): process_text_for_pdf(line)
+            # 10 documents streamed into a ZIP; peak_kb should stay close to a single create_pdf
+            def run_zip(text=text):
+                for _ in iter_zip((f"{i}.{fmt}", fmt, text, USER) for i in range(5) for fmt in ('pdf', 'docx')): pass
+            add(f"parse_cv/{tag}", lambda run=run_parse: (run, pages))
+            add(f"process_text_for_pdf/{tag}", lambda run=run_bidi: (run, pages))
+            add(f"create_pdf/{tag}", lambda text=text: (lambda: create_pdf(text, USER), pages), needs_pdf=True)
+            add(f"create_docx/{tag}", lambda text=text: (lambda: create_docx(text, USER), pages))
+            add(f"export_zip/{tag}", lambda run=run_zip: (run, pages * 10), needs_pdf=True)
+            add(f"extract_pdf/{tag}", lambda doc=pdf_bytes: (lambda b=doc(): extract_text_from_pdf(io.BytesIO(b)), pages), needs_pdf=True)
+            add(f"extract_pdf_budget/{tag}", lambda doc=pdf_bytes: (lambda b=doc(): extract_text_from_pdf(io.BytesIO(b), IMPORT_CHAR_BUDGET), pages), needs_pdf=True)
+            add(f"extract_docx/{tag}", lambda doc=docx_bytes: (lambda b=doc(): extract_text_from_docx(io.BytesIO(b)), pages))
+        data = synthetic_cv_data(pages); llm = StubLLM(pages)
+
+        def run_step6(data=data, llm=llm, store=None):
+            # section prompts -> (stub) generation -> parse -> local ATS score
+            cv, _, _ = build_resume(resume_sections(data), {} if store is None else store, llm.chat)
+            parse_cv.__wrapped__(cv); ats.score(cv, data['target_job'])
+        def warm_case(run=run_step6):
+            warm = {}; run(store=warm)
+            return lambda: run(store=warm)
+        add(f"resume_sections/{pages}p", lambda data=data: (lambda: resume_sections(data), pages))
+        add(f"step6_pipeline/{pages}p", lambda run=run_step6, llm=llm: (run, pages, llm))
+        add(f"step6_no_changes/{pages}p", lambda make=warm_case, llm=llm: (make(), pages, llm))
+    return cases, skipped
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    # A case regresses when its p50 is slower by more than `tolerance` (relative)
+    # and by more than `min_delta_ms` (absolute, so sub-ms jitter is ignored), or
+    # when it makes more (stub) LLM calls per run than the baseline
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base: continue
+        if cur['p50_ms'] > base['p50_ms'] * (1 + tolerance) and cur['p50_ms'] - base['p50_ms'] > min_delta_ms:
+            regressions.append((name, 'p50', f"{base['p50_ms']:.2f} ms", f"{cur['p50_ms']:.2f} ms"))
+        if base.get('llm_calls') is not None and (cur.get('llm_calls') or 0) > base['llm_calls']:
+            regressions.append((name, 'llm calls', base['llm_calls'], cur['llm_calls']))
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline benchmarks for rendering, parsing and prompt assembly.")
+    ap.add_argument("--iterations", type=int, default=20)
+    ap.add_argument("--pages", type=int, nargs="+", default=list(PAGES))
+    ap.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--compare", action="store_true", help="Exit 1 if any p50 is slower than the baseline by more than --tolerance, or a case makes more LLM calls")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--min-delta-ms", type=float, default=1.0)
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args(argv)
+
+    cases, skipped = build_cases(args.pages, lambda name: args.filter in name)
+    if skipped: print(f"skipping {len(skipped)} PDF cases: Amiri fonts not found (set CV_FONT_DIR)", file=sys.stderr)
+    results = {name: measure(fn, args.iterations, pages, *llm) for name, (fn, pages, *llm) in cases.items()}
+
+    if args.json: print(json.dumps(results, indent=2))
+    else:
+        print(f"{'case':40} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'peak KB':>10} {'docs/s':>10} {'pages/s':>10} {'llm calls':>10}")
+        for name, r in results.items():
+            calls = "-" if r['llm_calls'] is None else f"{r['llm_calls']:.1f}"
+            print(f"{name:40} {r['p50_ms']:10.2f} {r['p90_ms']:10.2f} {r['p99_ms']:10.2f} {r['peak_kb']:10.1f} {r['docs_per_s']:10.2f} {r['pages_per_s']:10.2f} {calls:>10}")
+
+    if args.save_baseline:
+        meta = {'python': platform.python_version(), 'machine': platform.machine(), 'iterations': args.iterations, 'created': time.strftime("%Y-%m-%d %H:%M:%S")}
+        with open(args.baseline, "w", encoding="utf-8") as f: json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline): print(f"no baseline at {args.baseline}", file=sys.stderr); return 2
+        with open(args.baseline, encoding="utf-8") as f: regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        for name, metric, before, now in regressions: print(f"REGRESSION {name}: {metric} {before} -> {now}", file=sys.stderr)
+        if regressions: return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import logging
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass, field, fields, astuple
+
+# ==========================================
+# TYPED CV MODEL
+# ==========================================
+# st.session_state keeps cv_data as plain dicts (the widgets bind to them);
+# this model is what gets serialised. Each section is stored as compact
+# positional JSON, so a draft row is little more than the user's own text.
+SCHEMA_VERSION = 1  # rows written by a newer schema are not loaded
+logger = logging.getLogger("cv_builder.drafts")
+
+
+@dataclass(slots=True)
+class Education:
+    uni: str = ''
+    col: str = ''
+    deg: str = ''
+    year: str = ''
+
+
+@dataclass(slots=True)
+class Project:
+    title: str = ''
+    link: str = ''
+    desc: str = ''
+
+
+@dataclass(slots=True)
+class Certificate:
+    title: str = ''
+    auth: str = ''
+
+
+@dataclass(slots=True)
+class Volunteering:
+    role: str = ''
+    org: str = ''
+    desc: str = ''
+
+
+@dataclass(slots=True)
+class CVDraft:
+    name: str = ''
+    email: str = ''
+    phone: str = ''
+    city: str = ''
+    linkedin: str = ''
+    portfolio: str = ''
+    github: str = ''
+    target_title: str = ''
+    skills: str = ''
+    languages: str = ''
+    raw_experience: str = ''
+    target_job: str = ''
+    final_cv: str = ''
+    cover_letter: str = ''
+    ats_analysis: str = ''
+    resume_sections: dict = field(default_factory=dict)  # {section: [input_key, text]}, see sections.py
+    step: int = 1
+    education: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+    certs: list = field(default_factory=list)
+    volunteering: list = field(default_factory=list)
+
+
+# Sections are the unit of incremental saving: editing one project rewrites
+# the "projects" row only, not the generated resume or the experience text.
+SCALAR_SECTIONS = {
+    'profile': ('name', 'email', 'phone', 'city', 'linkedin', 'portfolio', 'github', 'target_title'),
+    'skills': ('skills', 'languages'),
+    'experience': ('raw_experience',),
+    'job': ('target_job',),
+    'resume': ('final_cv',),
+    'letter': ('cover_letter',),
+    'ats': ('ats_analysis',),
+    'sections': ('resume_sections',),
+    'meta': ('step',),
+}
+LIST_SECTIONS = {'education': Education, 'projects': Project, 'certs': Certificate, 'volunteering': Volunteering}
+SESSION_LISTS = {'education': 'education_entries', 'projects': 'project_entries', 'certs': 'cert_entries', 'volunteering': 'vol_entries'}
+GENERATED = ('final_cv', 'cover_letter', 'ats_analysis')
+
+
+def _item(cls, d):
+    return cls(**{f.name: str(d.get(f.name) or '') for f in fields(cls)})
+
+
+def from_session(cv_data, session):
+    # cv_data dict + generated texts / step from session state -> CVDraft
+    draft = CVDraft(step=int(session.get('step', 1)))
+    for name in SCALAR_SECTIONS['profile'] + SCALAR_SECTIONS['skills'] + ('raw_experience', 'target_job'):
+        setattr(draft, name, str(cv_data.get(name) or ''))
+    for name in GENERATED: setattr(draft, name, session.get(name) or '')
+    draft.resume_sections = dict(session.get('resume_sections') or {})
+    for section, cls in LIST_SECTIONS.items():
+        setattr(draft, section, [_item(cls, d) for d in cv_data.get(SESSION_LISTS[section]) or []])
+    return draft
+
+
+def to_session(draft):
+    # CVDraft -> (cv_data dict, {final_cv, cover_letter, ats_analysis, step})
+    cv_data = {name: getattr(draft, name) for name in SCALAR_SECTIONS['profile'] + SCALAR_SECTIONS['skills'] + ('raw_experience', 'target_job') if getattr(draft, name)}
+    for section, key in SESSION_LISTS.items():
+        cv_data[key] = [{f.name: getattr(item, f.name) for f in fields(item)} for item in getattr(draft, section)]
+    extras = {name: getattr(draft, name) for name in GENERATED}
+    extras['step'] = draft.step
+    extras['resume_sections'] = draft.resume_sections
+    return cv_data, extras
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_sections(draft):
+    blobs = {s: _dumps([getattr(draft, n) for n in names]) for s, names in SCALAR_SECTIONS.items()}
+    for s in LIST_SECTIONS: blobs[s] = _dumps([list(astuple(item)) for item in getattr(draft, s)])
+    return blobs
+
+
+def _decode_section(draft, s, blob):
+    # Raises ValueError/TypeError on a row that does not match the model
+    values = json.loads(blob)
+    if not isinstance(values, list): raise TypeError(f"expected a list, got {type(values).__name__}")
+    if s in LIST_SECTIONS:
+        cls = LIST_SECTIONS[s]; width = len(fields(cls))
+        if not all(isinstance(row, list) and all(isinstance(v, str) for v in row) for row in values): raise TypeError("expected rows of strings")
+        setattr(draft, s, [cls(*row[:width]) for row in values])
+        return
+    defaults = CVDraft()
+    for n, v in zip(SCALAR_SECTIONS[s], values):
+        if not isinstance(v, type(getattr(defaults, n))): raise TypeError(f"{n}: unexpected {type(v).__name__}")
+        setattr(draft, n, v)
+
+
+def decode_sections(blobs):
+    # Missing sections/fields fall back to defaults, so older rows still load; so
+    # does a malformed section, which must not make the whole draft unreadable
+    draft = CVDraft()
+    for s in (*SCALAR_SECTIONS, *LIST_SECTIONS):
+        if s not in blobs: continue
+        scratch = CVDraft()
+        try: _decode_section(scratch, s, blobs[s])
+        except (ValueError, TypeError) as e:
+            logger.warning("skipping unreadable draft section %r: %s", s, e); continue
+        for n in SCALAR_SECTIONS.get(s, (s,)): setattr(draft, n, getattr(scratch, n))
+    return draft
+
+
+def section_hashes(blobs):
+    return {s: hashlib.blake2b(b.encode("utf-8"), digest_size=16).hexdigest() for s, b in blobs.items()}
+
+
+# ==========================================
+# DRAFT STORE (SQLITE)
+# ==========================================
+# A local file, so drafts are per host: SQLite in WAL mode must not live on a
+# network filesystem. Another backend only needs load() and save().
+DRAFT_DB = os.environ.get("CV_DRAFT_DB", ".drafts.sqlite3")  # "off" disables drafts
+DRAFT_TTL_DAYS = float(os.environ.get("CV_DRAFT_TTL_DAYS", 30))
+PURGE_INTERVAL = 3600  # seconds between expiry passes in a long-running process
+
+
+class DraftStore:
+    def __init__(self, path=DRAFT_DB, ttl_days=DRAFT_TTL_DAYS):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS draft_sections (draft_id TEXT NOT NULL, section TEXT NOT NULL, blob TEXT NOT NULL, schema INTEGER NOT NULL, updated REAL NOT NULL, PRIMARY KEY (draft_id, section))")
+        self._ttl = ttl_days * 86400
+        self.purge()
+
+    def purge(self):
+        # Expires whole drafts by their latest edit: untouched sections of a draft
+        # still being edited are older than the TTL but must survive with it
+        now = time.time(); self._purged = now
+        with self._lock:
+            try: self._db.execute("DELETE FROM draft_sections WHERE draft_id IN (SELECT draft_id FROM draft_sections GROUP BY draft_id HAVING MAX(updated) < ?)", (now - self._ttl,))
+            except sqlite3.Error: pass
+
+    def load(self, draft_id):
+        # Whole draft in a single query; returns {section: blob}
+        try:
+            with self._lock:
+                rows = self._db.execute("SELECT section, blob FROM draft_sections WHERE draft_id = ? AND schema <= ?", (draft_id, SCHEMA_VERSION)).fetchall()
+        except sqlite3.Error: return {}  # a broken store must never fail the page
+        return dict(rows)
+
+    def save(self, draft_id, blobs, known_hashes):
+        # Writes only the sections whose content hash differs from `known_hashes`; returns the new hashes.
+        # On a database error nothing is recorded as saved, so the next run retries.
+        hashes = section_hashes(blobs)
+        changed = [(draft_id, s, blobs[s], SCHEMA_VERSION, time.time()) for s, h in hashes.items() if known_hashes.get(s) != h]
+        if changed:
+            with self._lock:
+                try:
+                    self._db.execute("BEGIN")
+                    self._db.executemany("INSERT OR REPLACE INTO draft_sections VALUES (?, ?, ?, ?, ?)", changed)
+                    self._db.execute("COMMIT")
+                except sqlite3.Error:
+                    if self._db.in_transaction: self._db.execute("ROLLBACK")
+                    return known_hashes, []
+        if time.time() - self._purged > PURGE_INTERVAL: self.purge()
+        return hashes, [c[1] for c in changed]
+
+
+class NullDraftStore:
+    def load(self, draft_id): return {}
+    def save(self, draft_id, blobs, known_hashes): return known_hashes, []
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try: _store = NullDraftStore() if DRAFT_DB == "off" else DraftStore()
+                except sqlite3.Error: _store = NullDraftStore()
+    return _store
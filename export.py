@@ -0,0 +1,51 @@
+import io
+import zipfile
+import metrics
+from renderer import RENDERERS
+
+# ==========================================
+# STREAMING ZIP EXPORT
+# ==========================================
+# Every document is rendered straight into its archive entry, so memory stays
+# at one document's working set however many are exported:
+#
+#     write_zip(docs, "out.zip")              # to disk (or any writable binary file)
+#     for chunk in iter_zip(docs): send(chunk)  # to an HTTP response, chunk by chunk
+#
+# `docs` is any iterable (a generator is fine) of (arcname, fmt, text, user_data).
+
+
+def add_document(zf, arcname, fmt, text, user_data):
+    # force_zip64: the entry size is unknown until the renderer has finished
+    with metrics.span("export.document") as info:
+        with zf.open(arcname, "w", force_zip64=True) as entry: RENDERERS[fmt](text, user_data, entry)
+        info['bytes'] = zf.getinfo(arcname).file_size
+    return info['bytes']
+
+
+def write_zip(docs, target):
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arcname, fmt, text, user_data in docs: add_document(zf, arcname, fmt, text, user_data)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Non-seekable sink: zipfile then writes data descriptors and never seeks back
+    def __init__(self): self.chunks = []
+    def writable(self): return True
+    def write(self, b): self.chunks.append(bytes(b)); return len(b)
+
+    def drain(self):
+        data = b"".join(self.chunks); self.chunks.clear()
+        return data
+
+
+def iter_zip(docs):
+    # Yields the archive as it is produced: one chunk per document, then the central directory
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for arcname, fmt, text, user_data in docs:
+            add_document(zf, arcname, fmt, text, user_data)
+            data = sink.drain()
+            if data: yield data
+    data = sink.drain()
+    if data: yield data
@@ -0,0 +1,27 @@
+from docx import Document
+from pypdf import PdfReader
+import metrics
+
+# ==========================================
+# CV TEXT EXTRACTION (UPLOADS)
+# ==========================================
+IMPORT_CHAR_BUDGET = 6000  # the parser prompt never looks further than this
+
+@metrics.traced("extract_pdf", metrics.text_size)
+def extract_text_from_pdf(file, max_chars=None):
+    # pypdf loads pages lazily, so stopping at the budget skips the remaining pages entirely
+    parts, total = [], 0
+    for page in PdfReader(file).pages:
+        text = page.extract_text() or ""; parts.append(text); total += len(text)
+        if max_chars and total >= max_chars: break
+    text = "\n".join(parts)
+    return text[:max_chars] if max_chars else text
+
+@metrics.traced("extract_docx", metrics.text_size)
+def extract_text_from_docx(file, max_chars=None):
+    parts, total = [], 0
+    for para in Document(file).paragraphs:
+        parts.append(para.text); total += len(para.text) + 1
+        if max_chars and total >= max_chars: break
+    text = "\n".join(parts)
+    return text[:max_chars] if max_chars else text
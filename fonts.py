@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+import requests
+from fpdf import FPDF
+import metrics
+
+# ==========================================
+# PROCESS-WIDE FONT REGISTRY
+# ==========================================
+# Streamlit re-executes app.py on every rerun, so anything cached there is
+# rebuilt each time. Imported modules live for the whole process, which is
+# where the resolved font files and their parsed metrics are kept.
+FONT_URL = "https://github.com/google/fonts/raw/main/ofl/amiri/Amiri-Regular.ttf"
+FONT_BOLD_URL = "https://github.com/google/fonts/raw/main/ofl/amiri/Amiri-Bold.ttf"
+
+# Local bundle directory (CV_FONT_DIR) and network fallback switch (CV_FONT_DOWNLOAD=0 disables it)
+FONT_DIR = os.environ.get("CV_FONT_DIR", "")
+ALLOW_DOWNLOAD = os.environ.get("CV_FONT_DOWNLOAD", "1") != "0"
+
+FONT_SOURCES = {
+    'Amiri': ("Amiri-Regular.ttf", FONT_URL),
+    'Amiri-Bold': ("Amiri-Bold.ttf", FONT_BOLD_URL),
+}
+TTF_MAGIC = (b'\x00\x01\x00\x00', b'true', b'OTTO')
+RETRY_AFTER = 60  # seconds before a missing font is looked up (and downloaded) again
+
+_lock = threading.RLock()
+_paths = {}    # family -> validated file path
+_failed = {}   # family -> monotonic time of the last failed lookup
+_metrics = {}  # family -> (fonts entry, font_files entries) parsed by fpdf once
+
+
+def is_valid_font(path):
+    try:
+        if os.path.getsize(path) < 1000: return False
+        with open(path, 'rb') as f: return f.read(4) in TTF_MAGIC
+    except OSError: return False
+
+
+def _download(url, path):
+    try:
+        resp = requests.get(url, timeout=10); resp.raise_for_status()
+        tmp = path + ".part"
+        with open(tmp, "wb") as f: f.write(resp.content)
+        os.replace(tmp, path)
+    except (requests.RequestException, OSError): pass
+
+
+def font_path(family):
+    # Resolve and validate a font file once per process; a failure (e.g. a
+    # download timeout) is retried after RETRY_AFTER instead of being final
+    if family in _paths: return _paths[family]
+    with _lock:
+        if family in _paths: return _paths[family]
+        if time.monotonic() - _failed.get(family, -RETRY_AFTER) < RETRY_AFTER: return None
+        fname, url = FONT_SOURCES[family]
+        path = os.path.join(FONT_DIR, fname)
+        if not is_valid_font(path) and ALLOW_DOWNLOAD: _download(url, path)
+        if not is_valid_font(path):
+            _failed[family] = time.monotonic(); return None
+        _failed.pop(family, None); _paths[family] = path
+        return path
+
+
+def _parse(family):
+    path = font_path(family)
+    if not path: raise RuntimeError(f"Font not available: {family}")
+    scratch = FPDF()
+    with metrics.span("fonts.parse", bytes=os.path.getsize(path)): scratch.add_font(family, '', path, uni=True)
+    fontkey = family.lower()
+    files = {k: v for k, v in scratch.font_files.items() if k in (fontkey, path)}
+    return scratch.fonts[fontkey], files
+
+
+def install(pdf, families=tuple(FONT_SOURCES)):
+    # Register fonts on a document from the shared metrics, instead of
+    # letting every FPDF instance re-read the TTF tables via add_font.
+    for family in families:
+        if family not in _metrics:
+            with _lock:
+                if family not in _metrics: _metrics[family] = _parse(family)
+        entry, files = _metrics[family]
+        fontkey = entry['fontkey']
+        if fontkey in pdf.fonts: continue
+        # 'cw' is read-only and shared; the glyph subset is per document
+        subset = list(range(0, 57)) if hasattr(pdf, 'str_alias_nb_pages') else list(range(0, 32))
+        pdf.fonts[fontkey] = dict(entry, i=len(pdf.fonts) + 1, subset=subset)
+        for k, v in files.items(): pdf.font_files[k] = dict(v)
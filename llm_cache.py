@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+# ==========================================
+# PERSISTENT LLM RESPONSE CACHE
+# ==========================================
+# Content-addressed: the key is a hash of (model, messages, temperature, extra
+# request options), so identical prompts from any session or process on the
+# same host share one SQLite file. Entries expire after a TTL and the file is
+# trimmed (least recently used first) once it grows past a size budget.
+CACHE_PATH = os.environ.get("CV_LLM_CACHE", ".llm_cache.sqlite3")   # "off" disables caching
+CACHE_TTL = int(os.environ.get("CV_LLM_CACHE_TTL", 7 * 24 * 3600))  # seconds
+CACHE_MAX_BYTES = int(float(os.environ.get("CV_LLM_CACHE_MAX_MB", 200)) * 1024 * 1024)
+EVICT_EVERY = 50  # puts between eviction passes
+
+
+def cache_key(model, messages, temperature=None, **options):
+    payload = {'model': model, 'messages': messages, 'temperature': temperature, 'options': options}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.ttl, self.max_bytes = ttl, max_bytes
+        self._lock = threading.Lock(); self._puts = 0
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")  # readers in other processes don't block writers
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key):
+        try: return self._get(key)
+        except sqlite3.Error: return None  # a broken cache must never fail the request
+
+    def put(self, key, value):
+        try: self._put(key, value)
+        except sqlite3.Error: pass
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None: return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,)); return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key, value, now, now, len(value.encode("utf-8"))))
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0: self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes: return
+        # Walk from least recently used and drop rows until we are back under budget
+        excess, doomed = total - self.max_bytes, []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            doomed.append((key,)); excess -= size
+            if excess <= 0: break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+
+class NullCache:
+    def get(self, key): return None
+    def put(self, key, value): pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    # One connection per process, shared by every Streamlit session
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try: _cache = NullCache() if CACHE_PATH == "off" else ResponseCache()
+                except sqlite3.Error: _cache = NullCache()
+    return _cache
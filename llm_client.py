@@ -0,0 +1,140 @@
+import os
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import httpx
+import groq
+from groq import Groq
+from llm_cache import cache_key
+from prompts import count_message_tokens
+
+# ==========================================
+# SHARED, RATE-LIMITED GROQ CLIENT
+# ==========================================
+# One long-lived client per API key for the whole process (Streamlit reruns
+# and sessions all reuse it). Every request goes through:
+#   - a token bucket for requests/min and one for tokens/min (the Groq quota)
+#   - a concurrency cap on the pooled HTTP connections
+#   - jittered exponential retries on 429 / 5xx / connection errors
+#   - coalescing: an identical non-streaming request already in flight is
+#     awaited instead of being sent a second time
+GROQ_RPM = float(os.environ.get("GROQ_RPM", 30))
+GROQ_TPM = float(os.environ.get("GROQ_TPM", 12000))
+GROQ_MAX_CONCURRENCY = int(os.environ.get("GROQ_MAX_CONCURRENCY", 8))
+GROQ_MAX_ATTEMPTS = int(os.environ.get("GROQ_MAX_ATTEMPTS", 4))
+GROQ_TIMEOUT = float(os.environ.get("GROQ_TIMEOUT", 60))
+GROQ_MAX_CLIENTS = int(os.environ.get("GROQ_MAX_CLIENTS", 16))  # distinct API keys kept open at once
+BACKOFF_BASE, BACKOFF_CAP = 1.0, 20.0  # seconds
+COMPLETION_ESTIMATE = 800  # tokens reserved for the reply when max_tokens is not set
+
+
+class TokenBucket:
+    def __init__(self, rate_per_min, capacity=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = float(capacity or rate_per_min)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1.0):
+        # Blocks until `amount` tokens are available; oversized requests just drain a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= amount:
+                    self.tokens -= amount; return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 5.0))
+
+
+def is_retryable(e):
+    if isinstance(e, (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)): return True
+    return isinstance(e, groq.APIStatusError) and e.status_code >= 500
+
+
+def retry_after(e):
+    # Seconds the server asked us to wait, or None when it did not say (0 is a valid answer)
+    try: return max(0.0, float(e.response.headers.get("retry-after")))
+    except (AttributeError, TypeError, ValueError): return None
+
+
+def describe_error(e):
+    # User-facing message for a request that failed after all retries
+    if isinstance(e, groq.RateLimitError): return "Error: The AI service is busy (rate limit reached). Please try again in a minute."
+    if isinstance(e, groq.AuthenticationError): return "Error: The Groq API key was rejected."
+    if isinstance(e, groq.APIConnectionError): return "Error: Could not reach the AI service. Please try again."
+    return f"Error: {str(e)}"
+
+
+class LLMClient:
+    def __init__(self, api_key):
+        self.http = httpx.Client(limits=httpx.Limits(max_connections=GROQ_MAX_CONCURRENCY, max_keepalive_connections=GROQ_MAX_CONCURRENCY), timeout=GROQ_TIMEOUT)
+        self.client = Groq(api_key=api_key, http_client=self.http, max_retries=0)  # retries are handled here
+        self.requests = TokenBucket(GROQ_RPM)
+        self.tokens = TokenBucket(GROQ_TPM)
+        self.slots = threading.BoundedSemaphore(GROQ_MAX_CONCURRENCY)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _send(self, messages, model, **options):
+        # One create() call behind both rate limiters, retried with jittered backoff
+        cost = count_message_tokens(messages) + options.get('max_tokens', COMPLETION_ESTIMATE)
+        for attempt in range(1, GROQ_MAX_ATTEMPTS + 1):
+            self.requests.acquire(); self.tokens.acquire(cost)
+            try: return self.client.chat.completions.create(model=model, messages=messages, **options)
+            except Exception as e:
+                if attempt == GROQ_MAX_ATTEMPTS or not is_retryable(e): raise
+                wait = retry_after(e)
+                if wait is None: wait = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                elif wait > BACKOFF_CAP: raise  # fail fast rather than hold the user's run and a slot for minutes
+                time.sleep(wait)
+
+    def complete(self, messages, model, **options):
+        # Returns the message text; concurrent identical requests share one API call
+        key = cache_key(model, messages, **options)
+        with self._inflight_lock:
+            fut = self._inflight.get(key); owner = fut is None
+            if owner: fut = self._inflight[key] = Future()
+        if not owner: return fut.result()
+        try:
+            with self.slots: fut.set_result(self._send(messages, model, **options).choices[0].message.content)
+        except Exception as e:
+            fut.set_exception(e)
+        finally:
+            with self._inflight_lock: self._inflight.pop(key, None)
+        return fut.result()
+
+    def stream(self, messages, model, **options):
+        # Yields text deltas; retries only happen before the first token arrives.
+        # The slot is held for the whole stream since it keeps a connection open.
+        with self.slots:
+            for chunk in self._send(messages, model, stream=True, **options):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta: yield delta
+
+
+_clients = OrderedDict()  # sha256(key) -> LLMClient for keys typed into the sidebar, least recently used first
+_shared = {}  # sha256(key) -> LLMClient for the app's own key; never evicted, so its quota buckets persist
+_clients_lock = threading.Lock()
+
+def get_client(api_key, shared=False):
+    # Each client holds its key and a connection pool, so at most GROQ_MAX_CLIENTS
+    # user keys are kept (wrong ones included). An evicted client is only dropped
+    # from the registry, not closed: a session may still be mid-run with it, and
+    # its pool is released once the last reference goes away.
+    ident = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    with _clients_lock:
+        if shared:
+            if ident not in _shared: _shared[ident] = LLMClient(api_key)
+            return _shared[ident]
+        if ident in _clients: _clients.move_to_end(ident)
+        else:
+            _clients[ident] = LLMClient(api_key)
+            while len(_clients) > GROQ_MAX_CLIENTS: _clients.popitem(last=False)
+        return _clients[ident]
@@ -0,0 +1,37 @@
+import re
+import functools
+from collections import namedtuple
+
+# ==========================================
+# CV MARKUP PARSER
+# ==========================================
+# The LLM writes the resume body as light markdown:
+#     ### SECTION            -> section header
+#     Role | Company | Year  -> role header (bold line)
+#     - achievement          -> bullet
+#     anything else          -> paragraph (summary, skills, ...)
+# parse_cv turns it into a flat tuple of Blocks once per CV text, and every
+# renderer walks that tuple, so all formats agree on the layout.
+SECTION, ROLE, BULLET, PARAGRAPH = 'section', 'role', 'bullet', 'paragraph'
+BULLET_MARKERS = ("-", "•")
+
+Block = namedtuple('Block', 'kind text')
+
+MARKDOWN_RE = re.compile(r"\*\*|#{2,}")
+
+
+@functools.lru_cache(maxsize=128)
+def parse_cv(text):
+    blocks = []
+    for line in (text or "").split('\n'):
+        line = line.strip()
+        if not line: continue
+        clean = MARKDOWN_RE.sub("", line).strip()
+        if "###" in line: kind, clean = SECTION, clean.upper()
+        elif line.startswith(BULLET_MARKERS):
+            # Only the leading marker is dropped; hyphens inside the text stay
+            kind, clean = BULLET, clean.lstrip("-• ").strip()
+        elif "|" in line: kind = ROLE
+        else: kind = PARAGRAPH
+        if clean: blocks.append(Block(kind, clean))
+    return tuple(blocks)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque, defaultdict
+from contextlib import contextmanager
+
+# ==========================================
+# HOT-PATH TIMING & COUNTERS
+# ==========================================
+# Process-wide recorder for per-stage durations plus token counts, cache hits
+# and output sizes. Recording is a perf_counter pair and a locked append, so it
+# stays on in production. Optional sinks:
+#   CV_METRICS_FILE     append every event as a JSON line
+#   CV_PROMETHEUS_FILE  node_exporter textfile, rewritten at most every CV_PROMETHEUS_INTERVAL seconds
+METRICS_FILE = os.environ.get("CV_METRICS_FILE")
+PROMETHEUS_FILE = os.environ.get("CV_PROMETHEUS_FILE")
+PROMETHEUS_INTERVAL = float(os.environ.get("CV_PROMETHEUS_INTERVAL", 15))
+MAX_EVENTS = 2000  # recent events kept for percentiles and the debug panel
+
+COUNTERS = ('tokens', 'bytes', 'chars')
+
+_lock = threading.Lock()
+_events = deque(maxlen=MAX_EVENTS)
+_totals = defaultdict(lambda: {'count': 0, 'errors': 0, 'seconds': 0.0, 'cache_hits': 0, 'tokens': 0, 'bytes': 0, 'chars': 0})
+_last_export = 0.0
+
+
+def record(stage, seconds, **fields):
+    global _last_export
+    event = dict(fields, stage=stage, ms=round(seconds * 1000, 3), ts=time.time())
+    with _lock:
+        _events.append(event)
+        t = _totals[stage]
+        t['count'] += 1; t['seconds'] += seconds
+        if fields.get('error'): t['errors'] += 1
+        if fields.get('cache_hit'): t['cache_hits'] += 1
+        for k in COUNTERS:
+            if fields.get(k): t[k] += int(fields[k])
+        export_due = PROMETHEUS_FILE and event['ts'] - _last_export >= PROMETHEUS_INTERVAL
+        if export_due: _last_export = event['ts']
+    if METRICS_FILE:
+        try:
+            with open(METRICS_FILE, "a", encoding="utf-8") as f: f.write(json.dumps(event) + "\n")
+        except OSError: pass
+    if export_due: write_prometheus(PROMETHEUS_FILE)
+
+
+@contextmanager
+def span(stage, **fields):
+    # with span("llm.chat") as info: info['tokens'] = ...
+    info = dict(fields); start = time.perf_counter()
+    try: yield info
+    except Exception:
+        info['error'] = True; raise
+    finally: record(stage, time.perf_counter() - start, **info)
+
+
+def traced(stage, measure=None):
+    # Decorator form; `measure(result)` returns extra fields such as {'bytes': ...}
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage) as info:
+                result = fn(*args, **kwargs)
+                if measure:
+                    try: info.update(measure(result))
+                    except Exception: pass
+                return result
+        return inner
+    return wrap
+
+
+def buffer_size(buf):
+    # BytesIO results, or a caller's file; zip entry streams cannot tell() and are measured by the caller
+    return {'bytes': buf.getbuffer().nbytes if hasattr(buf, 'getbuffer') else buf.tell()}
+def text_size(text): return {'chars': len(text or "")}
+
+
+# ==========================================
+# REPORTING
+# ==========================================
+def _percentile(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))] if sorted_vals else 0.0
+
+
+def summary():
+    with _lock:
+        totals = {k: dict(v) for k, v in _totals.items()}
+        recent = defaultdict(list)
+        for e in _events: recent[e['stage']].append(e['ms'])
+    rows = []
+    for stage in sorted(totals):
+        t = totals[stage]; ms = sorted(recent.get(stage, []))
+        rows.append({
+            'stage': stage, 'count': t['count'], 'errors': t['errors'],
+            'avg_ms': round(1000 * t['seconds'] / t['count'], 1) if t['count'] else 0.0,
+            'p50_ms': round(_percentile(ms, 0.50), 1), 'p95_ms': round(_percentile(ms, 0.95), 1),
+            'cache_hits': t['cache_hits'], 'tokens': t['tokens'], 'bytes': t['bytes'], 'chars': t['chars'],
+        })
+    return rows
+
+
+def recent_events(limit=50):
+    with _lock: return list(_events)[-limit:]
+
+
+def prometheus_text():
+    with _lock: totals = {k: dict(v) for k, v in _totals.items()}
+    series = (
+        ('cv_stage_duration_seconds_total', 'counter', 'Total time spent per stage.', 'seconds'),
+        ('cv_stage_calls_total', 'counter', 'Calls per stage.', 'count'),
+        ('cv_stage_errors_total', 'counter', 'Failed calls per stage.', 'errors'),
+        ('cv_stage_cache_hits_total', 'counter', 'Cache hits per stage.', 'cache_hits'),
+        ('cv_stage_tokens_total', 'counter', 'Estimated LLM tokens per stage.', 'tokens'),
+        ('cv_stage_output_bytes_total', 'counter', 'Rendered document bytes per stage.', 'bytes'),
+        ('cv_stage_chars_total', 'counter', 'Extracted/generated characters per stage.', 'chars'),
+    )
+    lines = []
+    for name, kind, help_text, field in series:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{stage="{stage}"}} {t[field]}' for stage, t in sorted(totals.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    # Atomic rename, as the textfile collector may read at any moment
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f: f.write(prometheus_text())
+        os.replace(tmp, path)
+    except OSError: pass
@@ -0,0 +1,184 @@
+import re
+import logging
+from collections import namedtuple
+
+# ==========================================
+# TOKEN-BUDGETED PROMPT BUILDER
+# ==========================================
+# Every prompt sent to Groq is assembled here. User input is compacted
+# (whitespace normalised, repeated blocks of lines dropped) and each section is trimmed
+# to its own token budget before it is placed into the prompt.
+logger = logging.getLogger("cv_builder.prompts")
+
+CHARS_PER_TOKEN = 4  # rough average for English text with the Llama 3 tokenizer
+
+# Per-section budgets in tokens; pass a dict with any of these keys to override
+DEFAULT_BUDGETS = {
+    'title': 30, 'skills': 300, 'experience': 1500, 'education': 200, 'projects': 700,
+    'certifications': 200, 'volunteering': 300, 'languages': 60, 'cv': 2500, 'jd': 1500,
+}
+
+SPACE_RE = re.compile(r"[ \t\u00a0]+")
+DEDUPE_KEY_RE = re.compile(r"[\W_]+")
+MIN_REPEAT_LINES = 3  # a single line or pair ("Key Responsibilities:", a bullet shared by two roles) may legitimately repeat
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def count_message_tokens(messages):
+    # ~4 tokens of chat-template overhead per message
+    return sum(estimate_tokens(m.get('content') or '') + 4 for m in messages)
+
+
+def compact(text):
+    # Normalise whitespace and drop blocks of MIN_REPEAT_LINES+ consecutive lines that
+    # repeat an earlier block (e.g. suggestions appended twice); blank lines are ignored when matching
+    lines = [SPACE_RE.sub(" ", line).strip() for line in (text or "").splitlines()]
+    rows = [i for i, line in enumerate(lines) if line]  # indices of non-blank lines
+    keys = [DEDUPE_KEY_RE.sub("", lines[i]).lower() for i in rows]
+    seen, drop, n = {}, set(), 0  # seen: key -> earlier positions in `rows`
+    while n < len(rows):
+        run = 0
+        for j in seen.get(keys[n], ()):
+            k = 0
+            while n + k < len(rows) and j + k < n and keys[j + k] == keys[n + k]: k += 1
+            run = max(run, k)
+        if run >= MIN_REPEAT_LINES:
+            drop.update(rows[n:n + run]); n += run; continue
+        seen.setdefault(keys[n], []).append(n); n += 1
+    out = []
+    for i, line in enumerate(lines):
+        if i in drop: continue
+        if not line:
+            if out and out[-1]: out.append("")
+            continue
+        out.append(line)
+    return "\n".join(out).strip()
+
+
+def trim_to_budget(text, max_tokens):
+    # Keep whole lines while they fit; hard-cut only when the first line alone is too long
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars: return text
+    cut = text.rfind("\n", 0, max_chars + 1)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+
+def fit(text, section, budgets=None):
+    budget = (budgets or {}).get(section, DEFAULT_BUDGETS[section])
+    return trim_to_budget(compact(text), budget)
+
+
+def log_request(kind, messages):
+    tokens = count_message_tokens(messages)
+    logger.info("%s request: ~%d prompt tokens", kind, tokens)
+    return tokens
+
+
+# ==========================================
+# PROMPTS
+# ==========================================
+def _section(title, body):
+    return f"### {title}\n{body}" if body else ""
+
+
+def education_block(entries):
+    lines = []
+    for e in entries or []:
+        if e.get('uni') or e.get('col'):
+            parts = [x for x in [e.get('deg'), e.get('col'), e.get('uni')] if x]
+            line = ", ".join(parts)
+            if e.get('year'): line += f" | {e.get('year')}"
+            lines.append(f"- {line}")
+    return "\n".join(lines)
+
+
+def projects_block(entries):
+    lines = []
+    for p in entries or []:
+        if p.get('title'):
+            head = p['title']
+            if p.get('link'): head += f" | {p['link']}"
+            lines.append(f"{head}\n- {p.get('desc','')}")  # Force bullet for desc
+    return "\n".join(lines)
+
+
+def certifications_block(entries):
+    return "\n".join(f"- {c['title']} | {c.get('auth','')}" for c in entries or [] if c.get('title'))
+
+
+def volunteering_block(entries):
+    return "\n".join(f"{v['role']} | {v.get('org','')}\n- {v.get('desc','')}" for v in entries or [] if v.get('role'))
+
+
+# ==========================================
+# PER-SECTION RESUME PROMPTS
+# ==========================================
+# The resume is generated one section at a time, so an edit to one project only
+# re-runs the projects prompt. Each prompt embeds exactly the inputs its section
+# depends on: the prompt text doubles as the section's cache key. Structured
+# sections (education, certifications, languages) need no model call at all.
+SectionSpec = namedtuple('SectionSpec', 'name title prompt static')
+TAILORED_SECTIONS = ('summary', 'skills')  # the only sections that change per job posting
+
+SECTION_RULES = """Act as a Resume Expert. Rewrite in Professional ENGLISH.
+Output ONLY the body of the {title} section: no "###" header, no name/contact info, no notes.
+
+TASK: {task}
+
+DATA TO PROCESS:
+{data}"""
+
+SECTION_TASKS = {
+    'summary': "Write a 3-4 sentence professional summary for a {title}, based on the skills and experience below.",
+    'skills': "Return the skills as one comma-separated list in a single paragraph. Fix spelling, drop duplicates.",
+    'experience': ("Write each role as a line \"Job Title | Company | Dates\" followed by **BULLET POINTS** (- ). "
+                   "Do NOT use paragraphs. Add realistic numbers/percentages to every bullet point. "
+                   "Sort REVERSE CHRONOLOGICAL (Newest First)."),
+    'projects': "Keep each \"Project | Link\" line as it is, followed by 1-3 bullet points (- ) with realistic metrics.",
+    'volunteering': "Keep each \"Role | Organisation\" line as it is, followed by 1-2 bullet points (- ).",
+}
+
+
+def _llm_section(name, title, data, target_title="", keywords=()):
+    if not data: return None
+    task = SECTION_TASKS[name].format(title=target_title or "professional")
+    if keywords and name in TAILORED_SECTIONS: task += f" Emphasise these keywords from the target job where they truthfully apply: {', '.join(keywords)}."
+    return SectionSpec(name, title, SECTION_RULES.format(title=title, task=task, data=data), None)
+
+
+def _static_section(name, title, text):
+    return SectionSpec(name, title, None, text) if text else None
+
+
+def resume_sections(cv_data, budgets=None, keywords=()):
+    # Ordered SectionSpecs for the resume; empty sections are left out.
+    # `keywords` (from ats.top_keywords) tailors the summary and skills to one job.
+    title = fit(cv_data.get('target_title', ''), 'title', budgets)
+    skills = fit(cv_data.get('skills', ''), 'skills', budgets)
+    experience = fit(cv_data.get('raw_experience', ''), 'experience', budgets)
+    languages = fit(cv_data.get('languages', ''), 'languages', budgets)
+    specs = [
+        _llm_section('summary', "PROFESSIONAL SUMMARY", "\n\n".join(x for x in (skills, experience) if x) or title, title, keywords),
+        _llm_section('skills', "TECHNICAL SKILLS", skills, keywords=keywords),
+        _llm_section('experience', "EXPERIENCE", experience),
+        _static_section('education', "EDUCATION", fit(education_block(cv_data.get('education_entries')), 'education', budgets)),
+        _llm_section('projects', "PROJECTS", fit(projects_block(cv_data.get('project_entries')), 'projects', budgets)),
+        _static_section('certifications', "CERTIFICATIONS", fit(certifications_block(cv_data.get('cert_entries')), 'certifications', budgets)),
+        _llm_section('volunteering', "VOLUNTEERING", fit(volunteering_block(cv_data.get('vol_entries')), 'volunteering', budgets)),
+        _static_section('languages', "LANGUAGES", ", ".join(x.strip() for x in languages.replace("\n", ",").split(",") if x.strip())),
+    ]
+    return [s for s in specs if s]
+
+
+def cover_letter_prompt(cv_data, jd="", budgets=None):
+    prompt = f"Write English Cover Letter for {cv_data.get('name', '')}, Role: {cv_data.get('target_title', '')}"
+    return prompt + f"\n\nJob Posting:\n{fit(jd, 'jd', budgets)}" if jd else prompt
+
+
+def ats_prompt(cv_text, jd, missing=(), budgets=None):
+    # The score and keyword gaps come from the local scorer (ats.py); the model only writes tips
+    gaps = f"\n\nMissing Keywords (already computed): {', '.join(missing)}" if missing else ""
+    return f"Analyze CV against JD:\n\nCV:{fit(cv_text, 'cv', budgets)}\n\nJD:{fit(jd, 'jd', budgets)}{gaps}\n\nOutput: Tips only, to close the gaps. No score."
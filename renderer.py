@@ -0,0 +1,171 @@
+import io
+import re
+import functools
+from docx import Document
+from docx.shared import Pt, Inches, RGBColor
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from fpdf import FPDF
+import arabic_reshaper
+from bidi.algorithm import get_display
+import fonts
+import metrics
+from markup import parse_cv, SECTION, ROLE, BULLET
+
+# ==========================================
+# 1. TEXT HELPERS
+# ==========================================
+# Hebrew/Arabic blocks (incl. Syriac, Thaana, NKo, Arabic Extended), RTL presentation forms and RTL control marks
+RTL_RE = re.compile('[\u0590-\u08ff\ufb1d-\ufdff\ufe70-\ufefc\u200f\u202b\u202e\u2067]')
+
+def has_rtl(text):
+    # isascii() is a C-level scan, so the common all-English line never reaches the regex
+    return not text.isascii() and RTL_RE.search(text) is not None
+
+@functools.lru_cache(maxsize=4096)
+def _shape_rtl(text):
+    try: return get_display(arabic_reshaper.reshape(text))
+    except Exception: return text
+
+def process_text_for_pdf(text):
+    if not text: return ""
+    # Reshaping/bidi is an identity for pure LTR text, so skip it entirely
+    if not has_rtl(text): return text
+    return _shape_rtl(text)
+
+def safe_filename(raw, default="CV"):
+    return "".join([c if c.isalnum() or c==" " else "_" for c in raw]).strip().replace(" ", "_") or default
+
+# ==========================================
+# 2. PROFESSIONAL PDF GENERATOR (MANUAL HEADER)
+# ==========================================
+PDF_CHUNK = 1 << 16
+
+def write_latin1(text, out):
+    # fpdf 1.7 keeps the finished document as a latin-1 str; encoding it a chunk
+    # at a time avoids a second full-size bytes copy
+    for i in range(0, len(text), PDF_CHUNK): out.write(text[i:i + PDF_CHUNK].encode("latin1"))
+
+class ProfessionalPDF(FPDF):
+    def header(self): pass 
+
+@metrics.traced("create_pdf", metrics.buffer_size)
+def create_pdf(text, user_data, out=None):
+    # Writes to `out` (any binary file/stream) when given, else returns a fresh BytesIO
+    # Setup PDF
+    pdf = ProfessionalPDF(orientation='P', unit='mm', format='A4')
+    pdf.set_margins(left=10, top=10, right=10) 
+    pdf.add_page()
+    
+    # Raises RuntimeError("Font not available: ...") when the Amiri fonts cannot be found;
+    # fpdf's core fonts are latin-1 only, so there is no working fallback for this layout
+    fonts.install(pdf)
+
+    # ---------------------------------------------------------
+    # 1. PYTHON-GENERATED HEADER (100% Control - No AI Errors)
+    # ---------------------------------------------------------
+    # Name
+    pdf.set_font('Amiri-Bold', '', 24)
+    pdf.set_text_color(0, 0, 0)
+    name = user_data.get('name', 'Name')
+    pdf.cell(0, 10, process_text_for_pdf(name), ln=True, align='C')
+    
+    # Contact Info Construction
+    parts = []
+    if user_data.get('phone'): parts.append(user_data['phone'])
+    if user_data.get('city'): parts.append(user_data['city'])
+    if user_data.get('email'): parts.append(user_data['email'])
+    if user_data.get('linkedin'): parts.append(user_data['linkedin'])
+    if user_data.get('portfolio'): parts.append(user_data['portfolio'])
+    if user_data.get('github'): parts.append(user_data['github'])
+    
+    contact_line = " | ".join(parts)
+    
+    pdf.set_font('Amiri', '', 9)
+    pdf.set_text_color(0, 0, 0) # Black
+    pdf.multi_cell(0, 5, process_text_for_pdf(contact_line), align='C')
+    pdf.ln(3)
+    
+    # Line Separator
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_line_width(0.5)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+
+    # ---------------------------------------------------------
+    # 2. AI-GENERATED BODY (Pre-parsed Blocks)
+    # ---------------------------------------------------------
+    for kind, block_text in parse_cv(text):
+        # --- HEADERS (### Section) ---
+        if kind == SECTION:
+            pdf.ln(4)
+            pdf.set_font('Amiri-Bold', '', 14)
+            pdf.cell(0, 8, process_text_for_pdf(block_text), ln=True, align='L')
+            
+            # Underline
+            pdf.set_line_width(0.5) 
+            pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+            pdf.set_line_width(0.2)
+            pdf.ln(2)
+            
+        # --- SUB-HEADERS (Bold roles, "Role | Company") ---
+        elif kind == ROLE:
+            pdf.ln(1)
+            pdf.set_font('Amiri-Bold', '', 11)
+            pdf.cell(0, 5, process_text_for_pdf(block_text), ln=True)
+            
+        # --- BULLET POINTS (Experience/Projects) ---
+        elif kind == BULLET:
+            pdf.set_font('Amiri', '', 10)
+            pdf.set_x(12) 
+            pdf.multi_cell(188, 5, "• " + process_text_for_pdf(block_text))
+            
+        # --- NORMAL TEXT (Summary/Skills) ---
+        else:
+            pdf.set_font('Amiri', '', 10)
+            pdf.multi_cell(0, 5, process_text_for_pdf(block_text))
+            pdf.ln(1)
+
+    buffer = io.BytesIO() if out is None else out
+    write_latin1(pdf.output(dest='S'), buffer)
+    if out is None: buffer.seek(0)
+    return buffer
+
+# ==========================================
+# 3. WORD GENERATOR
+# ==========================================
+@metrics.traced("create_docx", metrics.buffer_size)
+def create_docx(text, user_data, out=None):
+    doc = Document()
+    style = doc.styles['Normal']; style.font.name = 'Arial'; style.font.size = Pt(10)
+    
+    # 1. Python Header
+    head = doc.add_paragraph()
+    head.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    run = head.add_run(user_data.get('name', ''))
+    run.bold = True; run.font.size = Pt(22); run.font.color.rgb = RGBColor(0,0,0)
+    
+    # Contact
+    parts = [user_data.get(k) for k in ['phone','city','email','linkedin','portfolio','github'] if user_data.get(k)]
+    contact_p = doc.add_paragraph(" | ".join(parts))
+    contact_p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    if contact_p.runs: contact_p.runs[0].font.size = Pt(9)
+
+    # 2. Body
+    for kind, block_text in parse_cv(text):
+        if kind == SECTION:
+            p = doc.add_paragraph(); p.paragraph_format.space_before = Pt(12)
+            run = p.add_run(block_text); run.bold = True; run.font.size = Pt(14)
+        elif kind == ROLE:
+            p = doc.add_paragraph(); p.paragraph_format.space_before = Pt(6)
+            run = p.add_run(block_text); run.bold = True
+        elif kind == BULLET:
+            doc.add_paragraph(block_text, style='List Bullet')
+        else:
+            doc.add_paragraph(block_text)
+            
+    buffer = io.BytesIO() if out is None else out
+    doc.save(buffer)
+    if out is None: buffer.seek(0)
+    return buffer
+
+RENDERERS = {'pdf': create_pdf, 'docx': create_docx}
@@ -0,0 +1,56 @@
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import metrics
+
+# ==========================================
+# INCREMENTAL SECTION GENERATION
+# ==========================================
+# Builds the resume from prompts.resume_sections(). `store` maps a section
+# name to [input_key, text] from the previous build (kept in session state /
+# the draft); only sections whose key changed are sent to the model, and those
+# run concurrently (the shared LLMClient applies the rate limits).
+MAX_WORKERS = 4
+HEADER_RE = re.compile(r"^\s*(#+.*|```\w*)\s*$")
+
+
+def section_key(spec):
+    source = spec.prompt if spec.prompt is not None else spec.static
+    return hashlib.sha256(f"{spec.name}\0{source}".encode("utf-8")).hexdigest()[:32]
+
+
+def clean_section(text):
+    # Drop headers / code fences the model adds despite the rules; the title is added on assembly
+    return "\n".join(line for line in (text or "").strip().split("\n") if not HEADER_RE.match(line)).strip()
+
+
+def assemble(specs, store):
+    return "\n\n".join(f"### {s.title}\n{store[s.name][1]}" for s in specs if store.get(s.name) and store[s.name][1])
+
+
+def stale_sections(specs, store):
+    return [s for s in specs if (store.get(s.name) or [None])[0] != section_key(s)]
+
+
+def build_resume(specs, store, chat, max_workers=MAX_WORKERS, on_done=None):
+    # chat(prompt) -> text, raising on failure. Updates `store` in place and
+    # returns (resume_text, regenerated_names, first_error). on_done(resume_text),
+    # if given, is called from this thread each time a section finishes, so the
+    # caller can show the resume filling in.
+    stale = stale_sections(specs, store)
+    for s in stale:
+        if s.prompt is None: store[s.name] = [section_key(s), s.static]
+    todo = [s for s in stale if s.prompt is not None]
+    error = None
+    with metrics.span("sections.build") as info:
+        info['sections'] = len(todo)
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(todo))) as pool:
+                futures = {pool.submit(chat, s.prompt): s for s in todo}
+                for fut in as_completed(futures):
+                    s = futures[fut]
+                    try: store[s.name] = [section_key(s), clean_section(fut.result())]
+                    except Exception as e: error = error or e; continue
+                    if on_done: on_done(assemble(specs, store))
+        for name in [n for n in store if n not in {s.name for s in specs}]: del store[name]
+    return assemble(specs, store), [s.name for s in stale], error
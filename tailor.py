@@ -0,0 +1,130 @@
+import os
+import re
+import time
+import tempfile
+import csv
+import io
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import ats
+import metrics
+from llm_client import describe_error
+from prompts import resume_sections, cover_letter_prompt, TAILORED_SECTIONS
+from renderer import safe_filename
+from export import add_document
+from sections import build_resume
+
+# ==========================================
+# MULTI-JOB TAILORING
+# ==========================================
+# One candidate, many postings. Sections that do not depend on the posting
+# (experience, projects, ...) are generated once and shared; each job then
+# only regenerates its tailored summary/skills and writes a cover letter.
+# Jobs run concurrently; the shared LLMClient keeps them within the Groq quota.
+MAX_JOBS = int(os.environ.get("CV_TAILOR_MAX_JOBS", 50))
+JOB_WORKERS = 4
+JD_SEPARATOR_RE = re.compile(r"^\s*-{3,}\s*$", re.M)  # a line of "---" between postings
+ZIP_DIR = os.path.join(tempfile.gettempdir(), "cv_builder_tailor")
+ZIP_MAX_AGE = float(os.environ.get("CV_TAILOR_ZIP_HOURS", 24)) * 3600  # archives are only kept for download
+
+Tailored = namedtuple('Tailored', 'index title jd resume cover_letter score missing error')
+
+
+def split_jds(text):
+    return [p.strip() for p in JD_SEPARATOR_RE.split(text or "") if p.strip()][:MAX_JOBS]
+
+
+def jd_title(jd, index):
+    first = next((line.strip() for line in jd.split("\n") if line.strip()), "")
+    return first[:60] or f"Job {index + 1}"
+
+
+def tailor_one(index, jd, cv_data, shared, chat, with_letter=True):
+    # `shared` holds the untailored sections; the copy keeps jobs from touching each other's store
+    title = jd_title(jd, index)
+    try:
+        with metrics.span("tailor.job"):
+            store = dict(shared)
+            resume, _, error = build_resume(resume_sections(cv_data, keywords=ats.top_keywords(jd)), store, chat, max_workers=2)
+            if error: raise error
+            letter = chat(cover_letter_prompt(cv_data, jd)) if with_letter else ""
+    except Exception as e:
+        return Tailored(index, title, jd, "", "", 0, [], describe_error(e))
+    result = ats.score(resume, jd)
+    return Tailored(index, title, jd, resume, letter, result.score, result.missing, None)
+
+
+def tailor_many(cv_data, jds, store, chat, workers=JOB_WORKERS, with_letter=True):
+    # Yields Tailored results as they finish. Shared sections built here are
+    # written back into `store`, so the single-job resume reuses them too.
+    base = dict(store)
+    _, _, error = build_resume([s for s in resume_sections(cv_data) if s.name not in TAILORED_SECTIONS], base, chat)
+    store.update({k: v for k, v in base.items() if k not in TAILORED_SECTIONS})
+    if error:
+        for i, jd in enumerate(jds): yield Tailored(i, jd_title(jd, i), jd, "", "", 0, [], describe_error(error))
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jds)))) as pool:
+        futures = [pool.submit(tailor_one, i, jd, cv_data, base, chat, with_letter) for i, jd in enumerate(jds)]
+        for fut in as_completed(futures): yield fut.result()
+
+
+# ==========================================
+# ZIP EXPORT
+# ==========================================
+def zip_path(draft_id):
+    # One archive per draft in a dedicated directory; stale ones are purged on the way
+    os.makedirs(ZIP_DIR, exist_ok=True)
+    purge_zips()
+    return os.path.join(ZIP_DIR, f"{draft_id}.zip")
+
+
+def purge_zips(max_age=ZIP_MAX_AGE):
+    cutoff = time.time() - max_age
+    try: entries = list(os.scandir(ZIP_DIR))
+    except OSError: return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff: os.remove(entry.path)
+        except OSError: pass
+
+
+def remove_zip(path):
+    try: os.remove(path)
+    except OSError: pass
+
+
+class TailorZip:
+    # Adds each job's documents to the archive as soon as it finishes, rendering
+    # straight into the zip entries (see export.py); summary.csv is written on close.
+    def __init__(self, fileobj, cv_data, formats=('pdf', 'docx')):
+        self.zip = zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED)
+        self.cv_data = cv_data
+        self.formats = formats
+        self.name = safe_filename(cv_data.get('name', ''))
+        self.rows = []
+
+    def add(self, r):
+        # A render failure is recorded in the job's row (its folder may hold a
+        # truncated file) instead of aborting the other jobs
+        folder = f"{r.index + 1:02d}_{safe_filename(r.title, 'Job')}"
+        error = r.error
+        if not error:
+            try:
+                for fmt in self.formats:
+                    add_document(self.zip, f"{folder}/{self.name}.{fmt}", fmt, r.resume, self.cv_data)
+                if r.cover_letter:
+                    add_document(self.zip, f"{folder}/Cover_Letter.docx", 'docx', r.cover_letter, self.cv_data)
+            except Exception as e:
+                error = f"Export failed: {type(e).__name__}: {e}"
+        self.rows.append((r.index + 1, r.title, r.score, ", ".join(r.missing[:10]), error or ""))
+
+    def close(self):
+        out = io.StringIO(); writer = csv.writer(out)
+        writer.writerow(("job", "title", "ats_score", "missing_keywords", "error"))
+        writer.writerows(sorted(self.rows))
+        self.zip.writestr("summary.csv", out.getvalue())
+        self.zip.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
@@ -0,0 +1,40 @@
+import ats
+
+
+def test_leading_dot_skill_is_not_the_bare_word():
+    assert ats.score("Net revenue grew 20%", "Experience with .NET") == ats.AtsResult(0, [], ['.net'])
+    assert ats.score("Built services in .NET", "Experience with .NET").matched == ['.net']
+
+
+def test_symbol_skills_stay_whole():
+    tokens = [surface for _, surface in ats.tokenize("C++, C#, Node.js and ASP.NET.")]
+    assert tokens == ['c++', 'c#', 'node.js', 'and', 'asp.net']
+
+
+def test_multi_word_skill_is_one_term():
+    counts, display = ats.extract_terms("Machine learning with Python")
+    assert counts["skill:machine learning"] == 1 and "machine" not in counts
+
+
+def test_score_counts_covered_keyword_weight():
+    full = ats.score("Python, Django and PostgreSQL", "Python Django PostgreSQL developer")
+    part = ats.score("Python only", "Python Django PostgreSQL developer")
+    assert full.score > part.score > 0
+    assert part.missing[:2] == ['django', 'postgresql']
+
+
+def test_empty_job_description_scores_zero():
+    assert ats.score("Python", "") == ats.AtsResult(0, [], [])
+
+
+def test_stem():
+    assert ats.stem("apis") == "api"
+    assert ats.stem("analysis") == "analysis"
+    assert ats.stem("c++") == "c++"
+
+
+def test_score_matrix_matches_single_scores():
+    cvs = ["Python and SQL", "React, TypeScript"]
+    jds = ["Python SQL engineer", "React TypeScript frontend developer"]
+    matrix = ats.score_matrix(cvs, jds)
+    assert [[int(v) for v in row] for row in matrix] == [[ats.score(cv, jd).score for jd in jds] for cv in cvs]
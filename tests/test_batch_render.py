@@ -0,0 +1,25 @@
+import json
+import os
+import pytest
+
+batch_render = pytest.importorskip("batch_render")  # needs the PDF/DOCX libraries
+
+
+def write_records(path, ids):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, item_id in enumerate(ids):
+            f.write(json.dumps({'id': item_id, 'cv_data': {'name': f"Jane {i}"}, 'final_cv': f"### SUMMARY\nCandidate {i}"}) + "\n")
+
+
+def test_colliding_ids_get_separate_files_and_resume(tmp_path):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out"
+    write_records(src, ["jane.doe", "jane_doe", "jane.doe"])
+    stats = batch_render.run_batch(str(src), str(out), formats=('docx',), workers=2)
+    assert stats == {'ok': 2, 'error': 1, 'skipped': 0}  # the repeated id is rejected, not rendered twice
+    names = sorted(n for n in os.listdir(out) if n != batch_render.MANIFEST_NAME)
+    assert names == sorted(batch_render.output_stem(i) + ".docx" for i in ("jane.doe", "jane_doe"))
+    assert batch_render.load_done(str(out)) == {'jane.doe': {'docx'}, 'jane_doe': {'docx'}}
+
+    again = batch_render.run_batch(str(src), str(out), formats=('docx',), workers=2)
+    assert again == {'ok': 0, 'error': 1, 'skipped': 2}
+    assert not [n for n in os.listdir(out) if n.endswith(".part")]
@@ -0,0 +1,69 @@
+import drafts
+
+CV = {
+    'name': "Jane", 'skills': "Python", 'raw_experience': "Dev at Acme",
+    'education_entries': [{'uni': "CU", 'col': "", 'deg': "BSc", 'year': "2016"}],
+    'project_entries': [{'title': "Billing", 'link': "", 'desc': "Rewrote it"}], 'cert_entries': [], 'vol_entries': [],
+}
+SESSION = {'step': 4, 'final_cv': "### X", 'cover_letter': "", 'ats_analysis': "", 'resume_sections': {'skills': ["k", "Python"]}}
+
+
+def test_round_trip():
+    blobs = drafts.encode_sections(drafts.from_session(CV, SESSION))
+    cv_data, extras = drafts.to_session(drafts.decode_sections(blobs))
+    assert cv_data == CV
+    assert extras == {'final_cv': "### X", 'cover_letter': "", 'ats_analysis': "", 'step': 4, 'resume_sections': {'skills': ["k", "Python"]}}
+
+
+def test_missing_sections_fall_back_to_defaults():
+    draft = drafts.decode_sections({'profile': '["Jane"]'})
+    assert draft.name == "Jane" and draft.step == 1 and draft.education == []
+
+
+def test_store_writes_only_changed_sections(tmp_path):
+    store = drafts.DraftStore(str(tmp_path / "d.sqlite3"))
+    blobs = drafts.encode_sections(drafts.from_session(CV, SESSION))
+    hashes, changed = store.save("a" * 32, blobs, {})
+    assert set(changed) == set(blobs)
+    edited = drafts.encode_sections(drafts.from_session(dict(CV, skills="Python, SQL"), SESSION))
+    assert store.save("a" * 32, edited, hashes)[1] == ['skills']
+    assert store.load("a" * 32) == edited
+
+
+def test_failed_save_rolls_back(tmp_path):
+    store = drafts.DraftStore(str(tmp_path / "d.sqlite3"))
+    store._db.execute("DROP TABLE draft_sections")
+    assert store.save("a" * 32, {'profile': "[]"}, {}) == ({}, [])
+    assert not store._db.in_transaction and store.load("a" * 32) == {}
+
+
+def test_ttl_expires_whole_drafts_by_last_edit(tmp_path, monkeypatch):
+    path, day = str(tmp_path / "d.sqlite3"), 86400
+    clock = [1000 * day]
+    monkeypatch.setattr(drafts.time, "time", lambda: clock[0])
+    store = drafts.DraftStore(path, ttl_days=30)
+    blobs = drafts.encode_sections(drafts.from_session(CV, SESSION))
+    hashes, _ = store.save("a" * 32, blobs, {})
+    store.save("b" * 32, {'profile': '["Old"]'}, {})
+    clock[0] += 29 * day
+    edited = drafts.encode_sections(drafts.from_session(dict(CV, raw_experience="Lead at Acme"), SESSION))
+    assert store.save("a" * 32, edited, hashes)[1] == ['experience']
+    clock[0] += 2 * day
+    restarted = drafts.DraftStore(path, ttl_days=30)
+    assert restarted.load("a" * 32) == edited  # untouched sections live as long as the draft
+    assert restarted.load("b" * 32) == {}
+
+
+def test_malformed_sections_fall_back_to_defaults():
+    blobs = drafts.encode_sections(drafts.from_session(CV, SESSION))
+    blobs.update(meta='["4"]', education='{"uni": "CU"}', projects="not json")
+    draft = drafts.decode_sections(blobs)
+    assert draft.name == "Jane" and draft.skills == "Python"
+    assert draft.step == 1 and draft.education == [] and draft.projects == []
+
+
+def test_rows_from_a_newer_schema_are_not_loaded(tmp_path):
+    store = drafts.DraftStore(str(tmp_path / "d.sqlite3"))
+    store.save("a" * 32, {'profile': '["Jane"]', 'skills': '["Python"]'}, {})
+    store._db.execute("UPDATE draft_sections SET schema = ? WHERE section = 'skills'", (drafts.SCHEMA_VERSION + 1,))
+    assert store.load("a" * 32) == {'profile': '["Jane"]'}
@@ -0,0 +1,21 @@
+import pytest
+
+fonts = pytest.importorskip("fonts")  # needs fpdf
+from fpdf import FPDF
+
+
+@pytest.mark.parametrize("alias_pages", [False, True])  # the glyph subset differs with a page-count alias
+def test_install_matches_add_font(monkeypatch, alias_pages):
+    # fonts.install writes fpdf's private font tables directly; if an fpdf
+    # upgrade changes what add_font stores, this catches it before PDFs break
+    monkeypatch.setattr(fonts, "ALLOW_DOWNLOAD", False)
+    paths = {family: fonts.font_path(family) for family in fonts.FONT_SOURCES}
+    if not all(paths.values()): pytest.skip("Amiri fonts not found; set CV_FONT_DIR")
+    installed, reference = FPDF(), FPDF()
+    for pdf in (installed, reference):
+        if alias_pages: pdf.alias_nb_pages()
+        pdf.add_page()
+    fonts.install(installed)
+    for family, path in paths.items(): reference.add_font(family, '', path, uni=True)
+    assert installed.fonts == reference.fonts
+    assert installed.font_files == reference.font_files
@@ -0,0 +1,24 @@
+from llm_cache import ResponseCache, cache_key
+
+MESSAGES = [{'role': "user", 'content': "hi"}]
+
+
+def test_cache_key_depends_on_every_input():
+    base = cache_key("m", MESSAGES, 0.3)
+    assert base == cache_key("m", [dict(MESSAGES[0])], 0.3)
+    assert base != cache_key("m", MESSAGES, 0.5)
+    assert base != cache_key("m", MESSAGES, 0.3, response_format={'type': "json_object"})
+
+
+def test_get_put_and_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=3600, max_bytes=10**6)
+    cache.put("k", "value")
+    assert cache.get("k") == "value" and cache.get("other") is None
+    expired = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=-1, max_bytes=10**6)
+    assert expired.get("k") is None
+
+
+def test_eviction_trims_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=3600, max_bytes=100)
+    for i in range(50): cache.put(f"k{i}", "x" * 10)  # the 50th put runs an eviction pass
+    assert cache.get("k0") is None and cache.get("k49") == "x" * 10
@@ -0,0 +1,83 @@
+import time
+import threading
+from types import SimpleNamespace
+import pytest
+
+llm_client = pytest.importorskip("llm_client")  # needs groq and httpx
+import groq
+import httpx
+
+MESSAGES = [{'role': "user", 'content': "hi"}]
+
+
+def reply(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def rate_limit(retry_after):
+    response = httpx.Response(429, headers={'retry-after': retry_after}, request=httpx.Request("POST", "https://api.groq.com"))
+    return groq.RateLimitError("busy", response=response, body=None)
+
+
+def make_client(create):
+    client = llm_client.LLMClient("test-key")
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client
+
+
+def test_identical_concurrent_calls_share_one_request():
+    calls, start = [], threading.Barrier(5)
+    def create(**kwargs):
+        calls.append(kwargs); time.sleep(0.2); return reply("ok")
+    client = make_client(create)
+    results = []
+    def worker():
+        start.wait(); results.append(client.complete(MESSAGES, "m"))
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert results == ["ok"] * 5 and len(calls) == 1
+
+
+def test_rate_limit_is_retried(monkeypatch):
+    sleeps, outcomes = [], [rate_limit("0"), reply("ok")]
+    monkeypatch.setattr(llm_client.time, "sleep", sleeps.append)
+    def create(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception): raise outcome
+        return outcome
+    assert make_client(create).complete(MESSAGES, "m") == "ok"
+    assert sleeps == [0.0]  # Retry-After: 0 is honoured, not treated as missing
+
+
+def test_long_retry_after_fails_fast(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_client.time, "sleep", lambda s: pytest.fail("slept for Retry-After"))
+    def create(**kwargs):
+        calls.append(kwargs); raise rate_limit("3600")
+    with pytest.raises(groq.RateLimitError): make_client(create).complete(MESSAGES, "m")
+    assert len(calls) == 1
+
+
+def test_non_retryable_error_raises_immediately():
+    calls = []
+    def create(**kwargs):
+        calls.append(kwargs); raise ValueError("bad request")
+    with pytest.raises(ValueError): make_client(create).complete(MESSAGES, "m")
+    assert len(calls) == 1
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = llm_client.TokenBucket(600, capacity=1)  # 10 tokens per second
+    bucket.acquire()
+    start = time.monotonic(); bucket.acquire()
+    assert time.monotonic() - start >= 0.05
+
+
+def test_shared_client_is_never_evicted(monkeypatch):
+    monkeypatch.setattr(llm_client, "GROQ_MAX_CLIENTS", 1)
+    shared = llm_client.get_client("app-key", shared=True)
+    first = llm_client.get_client("user-key-1")
+    llm_client.get_client("user-key-2")
+    assert llm_client.get_client("app-key", shared=True) is shared
+    assert llm_client.get_client("user-key-1") is not first
@@ -0,0 +1,17 @@
+from markup import parse_cv, Block, SECTION, ROLE, BULLET, PARAGRAPH
+
+
+def test_block_kinds():
+    text = "### Experience\nDev | Acme | 2020\n- Cut costs by 10% - twice\n• Shipped v2\n\n**Python**, SQL"
+    assert parse_cv(text) == (
+        Block(SECTION, "EXPERIENCE"),
+        Block(ROLE, "Dev | Acme | 2020"),
+        Block(BULLET, "Cut costs by 10% - twice"),
+        Block(BULLET, "Shipped v2"),
+        Block(PARAGRAPH, "Python, SQL"),
+    )
+
+
+def test_empty_input():
+    assert parse_cv("") == ()
+    assert parse_cv(None) == ()
@@ -0,0 +1,26 @@
+from prompts import compact, trim_to_budget, estimate_tokens, fit, cover_letter_prompt
+
+
+def test_compact_drops_repeated_blocks_and_spaces():
+    suggestions = "- Cut latency by 38%\n- Led 5 engineers\n- Automated CI/CD"
+    text = f"Dev at Acme\n{suggestions}\n\n\n{suggestions.replace(' ', '   ')}\nOK"
+    assert compact(text) == f"Dev at Acme\n{suggestions}\n\nOK"
+
+
+def test_compact_keeps_lines_repeated_per_role():
+    text = ("Role A\nKey Responsibilities:\n- Owned the billing service\n- Ran on-call\n"
+            "Role B\nKey Responsibilities:\n- Owned the billing service\n- Hired the team")
+    assert compact(text) == text
+
+
+def test_trim_keeps_whole_lines():
+    assert trim_to_budget("aaaa\nbbbb\ncccc", 2) == "aaaa"
+    assert estimate_tokens("abcde") == 2
+
+
+def test_fit_uses_budget_overrides():
+    assert fit("x" * 100, 'skills', {'skills': 5}) == "x" * 20
+
+
+def test_cover_letter_prompt():
+    assert cover_letter_prompt({'name': "Jane", 'target_title': "Dev"}) == "Write English Cover Letter for Jane, Role: Dev"
@@ -0,0 +1,62 @@
+from prompts import resume_sections
+from sections import build_resume, clean_section
+
+CV = {
+    'target_title': "Backend Engineer", 'skills': "Python, SQL", 'raw_experience': "Dev at Acme",
+    'languages': "English\nArabic", 'education_entries': [{'uni': "CU", 'deg': "BSc", 'year': "2016"}],
+    'project_entries': [{'title': "Billing", 'desc': "Rewrote it"}], 'cert_entries': [], 'vol_entries': [],
+}
+
+
+class Chat:
+    def __init__(self): self.prompts = []
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return "### HEADER\nbody"
+
+
+def test_static_sections_need_no_model_call():
+    specs = {s.name: s for s in resume_sections(CV)}
+    assert specs['education'].prompt is None and specs['education'].static == "- BSc, CU | 2016"
+    assert specs['languages'].static == "English, Arabic"
+
+
+def test_only_changed_sections_are_regenerated():
+    store, chat = {}, Chat()
+    text, regenerated, error = build_resume(resume_sections(CV), store, chat)
+    assert error is None and len(chat.prompts) == 4 and "### PROJECTS\nbody" in text
+    edited = dict(CV, project_entries=[{'title': "Billing", 'desc': "Rewrote it in Go"}])
+    _, regenerated, _ = build_resume(resume_sections(edited), store, chat)
+    assert regenerated == ['projects'] and len(chat.prompts) == 5
+
+
+def test_on_done_reports_each_finished_section():
+    shown = []
+    text, _, _ = build_resume(resume_sections(CV), {}, Chat(), on_done=shown.append)
+    assert len(shown) == 4 and shown[-1] == text
+    assert all(a.count("###") < b.count("###") for a, b in zip(shown, shown[1:]))
+
+
+def test_removed_sections_leave_the_store():
+    store = {}
+    build_resume(resume_sections(CV), store, Chat())
+    text, _, _ = build_resume(resume_sections(dict(CV, project_entries=[])), store, Chat())
+    assert 'projects' not in store and "PROJECTS" not in text
+
+
+def test_failed_section_stays_stale():
+    def chat(prompt): raise RuntimeError("busy")
+    store = {}
+    _, _, error = build_resume(resume_sections(CV), store, chat)
+    assert isinstance(error, RuntimeError) and 'experience' not in store and 'education' in store
+
+
+def test_keywords_only_change_tailored_sections():
+    plain = {s.name: s for s in resume_sections(CV)}
+    tailored = {s.name: s for s in resume_sections(CV, keywords=["kafka"])}
+    assert "kafka" in tailored['skills'].prompt and "kafka" in tailored['summary'].prompt
+    assert tailored['experience'] == plain['experience']
+
+
+def test_clean_section_drops_headers_and_fences():
+    assert clean_section("### SKILLS\n```\nPython\n```") == "Python"
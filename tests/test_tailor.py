@@ -0,0 +1,24 @@
+import io
+import zipfile
+import pytest
+
+tailor = pytest.importorskip("tailor")  # needs groq and the PDF/DOCX libraries
+import export
+
+
+def result(index, resume="### SUMMARY\nBackend engineer"):
+    return tailor.Tailored(index, f"Job {index + 1}", "jd", resume, "", 80, ["kafka"], None)
+
+
+def test_render_failure_is_recorded_per_job(monkeypatch):
+    def render(text, user_data, out):
+        if "broken" in text: raise RuntimeError("Font not available: Amiri")
+        out.write(text.encode("utf-8"))
+    monkeypatch.setitem(export.RENDERERS, 'pdf', render)
+    buf = io.BytesIO()
+    with tailor.TailorZip(buf, {'name': "Jane"}, formats=('pdf',)) as archive:
+        archive.add(result(0, "broken")); archive.add(result(1))
+    assert archive.rows[0][4] == "Export failed: RuntimeError: Font not available: Amiri"
+    assert archive.rows[1][4] == ""
+    with zipfile.ZipFile(buf) as zf:
+        assert zf.read("02_Job_2/Jane.pdf").startswith(b"### SUMMARY") and "summary.csv" in zf.namelist()